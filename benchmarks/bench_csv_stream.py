@@ -0,0 +1,116 @@
+"""Benchmark de la exportación e importación de CSV por bloques (`csv_stream.py`).
+
+Genera una tabla `historical` sintética de `--rows` días con fechas en el formato de Yahoo y compara
+la exportación anterior del collector (toda la tabla en listas de Python, ordenada en Python) con
+la exportación por cursor, y la importación por lotes con una que lee todo el CSV antes de insertar.
+Mide tiempo y pico de memoria de Python (tracemalloc, que hace más lentas por igual todas las variantes):
+
+    python benchmarks/bench_csv_stream.py --rows 100000
+"""
+import argparse
+import csv
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src", "proyecto", "static", "models"))
+
+import csv_stream  # noqa: E402
+from collector import DataCollector  # noqa: E402
+
+
+def build_db(path, rows):
+    conn = sqlite3.connect(path)
+    DataCollector._create_table(conn.cursor())
+    start = datetime.date(1000, 1, 1)
+    with conn:
+        conn.executemany(DataCollector.UPSERT_SQL, (
+            (csv_stream.yahoo_date(start + datetime.timedelta(days=i)), 100.0 + i % 97, 101.5 + i % 89,
+             99.25 + i % 83, 100.5 + i % 79, 1000 + i) for i in range(rows)))
+    conn.close()
+
+
+def export_in_memory(db_path, csv_path):
+    """Exportación anterior: `load_from_db` (lista completa ordenada en Python) + `writerows`."""
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT date, open, high, low, close, volume FROM historical").fetchall()
+    conn.close()
+    rows.sort(key=lambda row: DataCollector.parse_date(row[0]) or datetime.datetime.min, reverse=True)
+    with open(csv_path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(csv_stream.SPANISH_HEADER)
+        writer.writerows(rows)
+
+
+def export_streaming(db_path, csv_path):
+    conn = sqlite3.connect(db_path)
+    csv_stream.register_date_key(conn)
+    csv_stream.export_query(conn, "SELECT date, open, high, low, close, volume FROM historical "
+                                  "ORDER BY date_key(date) DESC", csv_path, header=csv_stream.SPANISH_HEADER)
+    conn.close()
+
+
+def import_in_memory(csv_path, db_path):
+    """Importación de referencia: todas las filas del CSV en una lista y un solo `executemany`."""
+    rows = [row for chunk in csv_stream.read_chunks(csv_path, chunk_size=sys.maxsize) for row in chunk]
+    conn = sqlite3.connect(db_path)
+    DataCollector._create_table(conn.cursor())
+    with conn:
+        conn.executemany(DataCollector.UPSERT_SQL, rows)
+    conn.close()
+
+
+def import_streaming(csv_path, db_path):
+    conn = sqlite3.connect(db_path)
+    DataCollector._create_table(conn.cursor())
+    csv_stream.import_csv(conn, csv_path, DataCollector.UPSERT_SQL)
+    conn.close()
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "historical.db")
+        build_db(db_path, args.rows)
+        old_csv, new_csv = os.path.join(tmp, "old.csv"), os.path.join(tmp, "new.csv")
+
+        results = [
+            ("exportar en memoria", *measure(export_in_memory, db_path, old_csv)),
+            ("exportar por bloques", *measure(export_streaming, db_path, new_csv)),
+        ]
+        with open(old_csv, "rb") as a, open(new_csv, "rb") as b:
+            identical = a.read() == b.read()
+        results += [
+            ("importar en memoria", *measure(import_in_memory, new_csv, os.path.join(tmp, "import_old.db"))),
+            ("importar por lotes", *measure(import_streaming, new_csv, os.path.join(tmp, "import_new.db"))),
+        ]
+        counts = [sqlite3.connect(os.path.join(tmp, name)).execute("SELECT COUNT(*) FROM historical").fetchone()[0]
+                  for name in ("import_old.db", "import_new.db")]
+
+    print(f"{args.rows} filas")
+    print(f"{'operación':<22}{'tiempo (s)':>12}{'pico memoria (MB)':>20}")
+    for name, elapsed, peak in results:
+        print(f"{name:<22}{elapsed:>12.2f}{peak / 2**20:>20.1f}")
+    print(f"CSV idénticos: {identical} | filas importadas: {counts}")
+
+
+if __name__ == "__main__":
+    main()
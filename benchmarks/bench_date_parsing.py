@@ -0,0 +1,83 @@
+"""Benchmark del parseo de fechas de `DataEnricher.enrich_data`.
+
+Compara la ruta original (`apply` fila a fila con `strptime`) contra `DataEnricher.parse_dates`
+(un `pd.to_datetime(format=...)` vectorizado por formato) con fechas en el formato de Yahoo
+Finance y un 1% de filas en otros formatos:
+
+    python benchmarks/bench_date_parsing.py --sizes 1800 100000 10000000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from enricher import DATE_FORMATS, DataEnricher  # noqa: E402
+
+
+def legacy_parse(dates):
+    """Ruta original: `try_parse_date` aplicada fila a fila y luego `pd.to_datetime`."""
+    def try_parse_date(date_str):
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(date_str, fmt)
+            except ValueError:
+                pass
+        return None
+
+    return pd.to_datetime(dates.apply(try_parse_date))
+
+
+def make_dates(size, seed=0):
+    """Genera `size` fechas en texto: 99% "Jun 15, 2025" y 1% "2025-06-15"."""
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, size), unit="D")
+    dates = pd.Series(days.strftime("%b %d, %Y"))
+    other = rng.random(size) < 0.01
+    dates[other] = days[other].strftime("%Y-%m-%d")
+    return dates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1800, 100_000, 10_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="Tamaño máximo en el que se ejecuta la ruta original (es muy lenta)")
+    args = parser.parse_args()
+
+    enricher = DataEnricher.__new__(DataEnricher)
+    enricher.db_path = "benchmark"
+
+    print(f"{'filas':>12}{'original (s)':>15}{'vectorizado (s)':>18}{'2ª carga (s)':>15}{'speedup':>10}")
+    for size in args.sizes:
+        dates = make_dates(size)
+        DataEnricher._format_cache.pop(enricher.db_path, None)
+
+        start = time.perf_counter()
+        vectorized = enricher.parse_dates(dates)
+        vectorized_time = time.perf_counter() - start
+
+        # Segunda carga de la misma fuente: el formato ganador se prueba primero
+        start = time.perf_counter()
+        enricher.parse_dates(dates)
+        cached_time = time.perf_counter() - start
+
+        if size <= args.legacy_max:
+            start = time.perf_counter()
+            legacy = legacy_parse(dates)
+            legacy_time = time.perf_counter() - start
+            assert (legacy.values == vectorized.values).all(), "Las fechas no coinciden con la ruta original"
+            print(f"{size:>12}{legacy_time:>15.3f}{vectorized_time:>18.3f}{cached_time:>15.3f}"
+                  f"{legacy_time / vectorized_time:>10.1f}")
+        else:
+            print(f"{size:>12}{'-':>15}{vectorized_time:>18.3f}{cached_time:>15.3f}{'-':>10}")
+
+
+if __name__ == "__main__":
+    main()
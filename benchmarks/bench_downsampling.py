@@ -0,0 +1,58 @@
+"""Benchmark de la reducción de puntos (`downsampling.py`) en los gráficos de líneas de Plotly.
+
+Para series sintéticas de distintos tamaños compara la figura completa contra la reducida con
+LTTB y con min/max: tamaño del JSON enviado al navegador y tiempo de construcción + serialización:
+
+    python benchmarks/bench_downsampling.py --sizes 1800 100000 1000000 --points 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src", "proyecto", "static", "models"))
+
+from downsampling import downsample  # noqa: E402
+
+
+def make_series(size, seed=0):
+    """Paseo aleatorio con frecuencia de minutos y una columna de media móvil."""
+    rng = np.random.default_rng(seed)
+    close = 2000 + np.cumsum(rng.normal(0, 5, size))
+    df = pd.DataFrame({"date": pd.date_range("2020-01-01", periods=size, freq="min"), "close": close})
+    df["Moving Average 30"] = df["close"].rolling(30).mean()
+    return df
+
+
+def build(df):
+    start = time.perf_counter()
+    payload = px.line(df, x="date", y=["close", "Moving Average 30"]).to_json()
+    return time.perf_counter() - start, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1800, 100_000, 1_000_000])
+    parser.add_argument("--points", type=int, default=1000, help="Puntos máximos por serie")
+    args = parser.parse_args()
+
+    print(f"{'filas':>10}{'modo':>9}{'puntos':>9}{'reducción (ms)':>16}{'figura (ms)':>13}{'JSON (KB)':>12}")
+    for size in args.sizes:
+        df = make_series(size)
+        for method in ("completo", "lttb", "minmax"):
+            start = time.perf_counter()
+            view = df if method == "completo" else downsample(df, "date", ["close", "Moving Average 30"],
+                                                              args.points, method=method)
+            reduce_time = time.perf_counter() - start
+            figure_time, payload = build(view)
+            print(f"{size:>10}{method:>9}{len(view):>9}{reduce_time * 1000:>16.1f}"
+                  f"{figure_time * 1000:>13.1f}{payload / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
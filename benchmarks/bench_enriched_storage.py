@@ -0,0 +1,83 @@
+"""Benchmark de carga de `enriched_historical`: SQLite (`SELECT *`) contra Parquet.
+
+Replica la tabla del proyecto `--scale` veces en un directorio temporal y mide el tiempo, el pico
+de memoria de Python (tracemalloc, no incluye los buffers de Arrow) y el tamaño del DataFrame
+resultante de cada forma de lectura de `enriched_store.py`:
+
+    python benchmarks/bench_enriched_storage.py --scale 100
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(ROOT, "src", "proyecto", "static", "data")
+sys.path.insert(0, os.path.join(ROOT, "src", "proyecto", "static", "models"))
+
+from enriched_store import DB_NAME, PARQUET_NAME, load_enriched  # noqa: E402
+
+
+def build_fixture(tmp, scale):
+    """Crea las copias SQLite y Parquet con la tabla original repetida `scale` veces."""
+    conn = sqlite3.connect(os.path.join(DATA_DIR, DB_NAME))
+    base = pd.read_sql_query("SELECT * FROM enriched_historical", conn)
+    conn.close()
+    base["date"] = pd.to_datetime(base["date"])
+
+    span = base["date"].max() - base["date"].min() + pd.Timedelta(days=1)
+    copies = []
+    for i in range(scale):
+        copy = base.copy()
+        copy["date"] = copy["date"] - span * i
+        copy["year"] = copy["date"].dt.year
+        copies.append(copy)
+    df = pd.concat(copies, ignore_index=True)
+
+    conn = sqlite3.connect(os.path.join(tmp, DB_NAME))
+    df.to_sql("enriched_historical", conn, index=False)
+    conn.close()
+    df.to_parquet(os.path.join(tmp, PARQUET_NAME), index=False)
+    return df
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=50, help="Veces que se replica la tabla original")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df = build_fixture(tmp, args.scale)
+        start, end = df["date"].max() - pd.Timedelta(days=365), df["date"].max()
+        cases = [
+            ("sqlite SELECT *", lambda: load_enriched(tmp, backend="sqlite")),
+            ("parquet completo", lambda: load_enriched(tmp, backend="parquet")),
+            ("sqlite close+1 año", lambda: load_enriched(tmp, ["date", "close"], start, end, backend="sqlite")),
+            ("parquet close+1 año", lambda: load_enriched(tmp, ["date", "close"], start, end, backend="parquet")),
+        ]
+
+        print(f"filas: {len(df)}")
+        print(f"{'lectura':<22}{'filas':>10}{'tiempo (ms)':>14}{'pico Python (MB)':>18}{'DataFrame (MB)':>16}")
+        for name, func in cases:
+            elapsed, peak, result = measure(func)
+            size = result.memory_usage(deep=True).sum()
+            print(f"{name:<22}{len(result):>10}{elapsed * 1000:>14.1f}{peak / 2**20:>18.1f}{size / 2**20:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark del artefacto JSON del modelo (`model_artifact.py`) contra el pickle de joblib.
+
+Ajusta el ARIMA del proyecto, lo guarda en ambos formatos en un directorio temporal y compara el
+tamaño en disco, el tiempo de carga (mediana de `--repeat` cargas) y que los pronósticos con sus
+intervalos coincidan, también después de extender ambos modelos con las últimas `--append` observaciones:
+
+    python benchmarks/bench_model_artifact.py --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src", "proyecto", "static", "models"))
+
+import modeller  # noqa: E402
+import model_artifact  # noqa: E402
+from model_artifact import load_artifact, save_artifact  # noqa: E402
+
+
+def median_time(load, path, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load(path)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--order", type=int, nargs=3, default=list(modeller.DEFAULT_ORDER), metavar=("P", "D", "Q"))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=30, help="Días pronosticados en la comparación")
+    parser.add_argument("--append", type=int, default=5, help="Observaciones que se añaden después de cargar")
+    args = parser.parse_args()
+
+    series = modeller.load_series().asfreq("D")
+    model_fit = modeller.fit(series.iloc[:-args.append], tuple(args.order))
+    new = series.iloc[-args.append:]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl_path = os.path.join(tmp, "arima_model.pkl")
+        json_path = os.path.join(tmp, "arima_model.json")
+        joblib.dump(model_fit, pkl_path)
+        save_artifact(model_fit, json_path)
+
+        # Primera carga aparte: incluye importar statsmodels en ambos casos
+        load_artifact(json_path), joblib.load(pkl_path)
+        rows = [
+            ("joblib .pkl", os.path.getsize(pkl_path), median_time(joblib.load, pkl_path, args.repeat)),
+            ("artefacto .json", os.path.getsize(json_path), median_time(load_artifact, json_path, args.repeat)),
+        ]
+        original = model_fit.get_forecast(args.steps)
+        rebuilt = load_artifact(json_path).get_forecast(args.steps)
+        appended_original = model_fit.append(new).forecast(args.steps)
+        appended_rebuilt = model_artifact.append(load_artifact(json_path), new).forecast(args.steps)
+
+    print(f"{'formato':<18}{'tamaño (KB)':>13}{'carga (ms)':>12}")
+    for name, size, load_time in rows:
+        print(f"{name:<18}{size / 1024:>13.1f}{load_time * 1000:>12.2f}")
+    print(f"Reducción: {rows[0][1] / rows[1][1]:.0f}x en tamaño, {rows[0][2] / rows[1][2]:.1f}x en tiempo de carga")
+
+    mean_error = np.max(np.abs(np.asarray(original.predicted_mean) - np.asarray(rebuilt.predicted_mean)))
+    interval_error = np.max(np.abs(np.asarray(original.conf_int()) - np.asarray(rebuilt.conf_int())))
+    print(f"Diferencia máxima a {args.steps} días: pronóstico {mean_error:.2e}, intervalos {interval_error:.2e}")
+    append_error = np.max(np.abs(np.asarray(appended_original) - np.asarray(appended_rebuilt)))
+    print(f"Diferencia máxima tras añadir {args.append} observaciones: {append_error:.2e}")
+    assert append_error < 1e-6, "El modelo reconstruido no se extiende igual que el original"
+
+
+if __name__ == "__main__":
+    main()
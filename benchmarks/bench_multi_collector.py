@@ -0,0 +1,92 @@
+"""Prueba/benchmark de `MultiTickerCollector` contra un servidor HTTP local.
+
+El servidor sirve la página guardada en `fixtures/` para cualquier `/quote/{symbol}/history`
+y puede simular respuestas 429 para ejercitar los reintentos, así que no requiere red:
+
+    python benchmarks/bench_multi_collector.py --symbols 24 --workers 8 --fail-every 5
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src", "proyecto", "static", "models"))
+
+from multi_collector import MultiTickerCollector  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "yahoo_history_eth.html")
+
+
+def make_server(body, latency, fail_every):
+    """Crea un servidor que responde con `body` y un 429 cada `fail_every` peticiones."""
+    state = {'requests': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                state['requests'] += 1
+                count = state['requests']
+            time.sleep(latency)
+            if fail_every and count % fail_every == 0:
+                self.send_response(429)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="Latencia simulada por petición (s)")
+    parser.add_argument("--fail-every", type=int, default=0, help="Responde 429 cada N peticiones")
+    args = parser.parse_args()
+
+    with open(FIXTURE, "rb") as f:
+        body = f.read()
+
+    server, state = make_server(body, args.latency, args.fail_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url_template = f"http://127.0.0.1:{server.server_port}/quote/{{symbol}}/history"
+    symbols = [f"SYM{i}-USD" for i in range(args.symbols)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "multi_historical.db")
+        for workers in (1, args.workers):
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            state['requests'] = 0
+            collector = MultiTickerCollector(symbols, url_template=url_template, db_path=db_path,
+                                             max_workers=workers, min_interval=0, backoff=0.05)
+            start = time.perf_counter()
+            results, failed = collector.collect(full_backfill=True)
+            elapsed = time.perf_counter() - start
+
+            conn = sqlite3.connect(db_path)
+            stored = conn.execute("SELECT COUNT(DISTINCT symbol), COUNT(*) FROM historical").fetchone()
+            conn.close()
+            assert not failed and stored[0] == len(symbols), "Faltan símbolos en la base de datos"
+            print(f"workers={workers:<3} símbolos={stored[0]:<4} filas={stored[1]:<7} "
+                  f"peticiones={state['requests']:<4} tiempo={elapsed:.2f}s")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark del motor de KPIs en streaming (`streaming_kpis.py`) contra `kpis.add_kpis`.
+
+Verifica que ambos coinciden sobre la BD enriquecida (también reanudando desde un checkpoint a
+mitad de la serie y cuando se revisan barras ya procesadas) y compara el costo de añadir una
+barra nueva: una actualización O(1) contra recalcular los KPIs sobre todo el histórico:
+
+    python benchmarks/bench_streaming_kpis.py --repeat 200
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src", "proyecto", "static", "models"))
+
+from kpis import KPI_COLUMNS, add_kpis  # noqa: E402
+from streaming_kpis import StreamingKPIs  # noqa: E402
+
+DEFAULT_DB = os.path.join(ROOT, "src", "proyecto", "static", "data", "enriched_historical.db")
+
+
+def load(db_path):
+    conn = sqlite3.connect(db_path)
+    df = pd.read_sql_query("SELECT date, open, high, low, close, volume FROM enriched_historical", conn)
+    conn.close()
+    df["date"] = pd.to_datetime(df["date"])
+    return df.sort_values("date", ignore_index=True)
+
+
+def max_error(expected, actual):
+    """Error relativo máximo por columna (los NaN deben coincidir en posición)."""
+    errors = {}
+    for column in KPI_COLUMNS:
+        a, b = expected[column].to_numpy(), actual[column].to_numpy()
+        assert np.array_equal(np.isnan(a), np.isnan(b)), f"NaN distintos en {column}"
+        valid = ~np.isnan(a)
+        errors[column] = float(np.max(np.abs(a[valid] - b[valid]) / np.maximum(np.abs(a[valid]), 1e-12)))
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--repeat", type=int, default=200, help="Barras añadidas en la medición de tiempos")
+    args = parser.parse_args()
+
+    df = load(args.db)
+    expected = add_kpis(df)
+
+    engine = StreamingKPIs()
+    streamed = engine.advance(df)
+    print(f"{len(df)} filas, error relativo máximo por KPI:")
+    for column, error in max_error(expected, streamed).items():
+        print(f"  {column:<20}{error:.2e}")
+
+    # Reanudar desde un checkpoint a mitad de la serie da el mismo resultado
+    half = len(df) // 2
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, "kpi_state.json")
+        first = StreamingKPIs()
+        first.advance(df.iloc[:half])
+        first.save(checkpoint)
+        resumed = StreamingKPIs.load(checkpoint).advance(df)
+    errors = max_error(expected.iloc[half:].reset_index(drop=True), resumed)
+    print(f"Reanudando desde checkpoint: error máximo {max(errors.values()):.2e}")
+
+    # Revisar las últimas barras ya procesadas (como hace el enriquecedor) obliga a recalcularlas
+    engine = StreamingKPIs()
+    engine.advance(df.iloc[:half])
+    revised = df.copy()
+    revised.loc[half - 3:half - 1, "close"] *= 1.01
+    recalculated = engine.advance(revised)
+    errors = max_error(add_kpis(revised).iloc[half - 3:].reset_index(drop=True), recalculated)
+    assert max(errors.values()) < 1e-9, errors
+    print(f"Con 3 barras revisadas: {len(recalculated)} barras recalculadas, error máximo {max(errors.values()):.2e}")
+
+    # Costo de añadir una barra: recalcular todo el histórico contra una actualización del estado
+    history, tail = df.iloc[:-args.repeat], df.iloc[-args.repeat:]
+    start = time.perf_counter()
+    for i in range(1, args.repeat + 1):
+        add_kpis(df.iloc[:len(history) + i])
+    full_time = (time.perf_counter() - start) / args.repeat
+
+    engine = StreamingKPIs()
+    engine.advance(history)
+    start = time.perf_counter()
+    for date, high, low, close in zip(tail["date"], tail["high"], tail["low"], tail["close"]):
+        engine.update(date, high, low, close)
+    stream_time = (time.perf_counter() - start) / args.repeat
+
+    print(f"Por barra nueva: add_kpis completo {full_time * 1e3:.2f} ms, "
+          f"streaming {stream_time * 1e6:.1f} µs ({full_time / stream_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
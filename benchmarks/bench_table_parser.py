@@ -0,0 +1,77 @@
+"""Benchmark de los backends de extracción de la tabla histórica de Yahoo Finance.
+
+Compara la ruta original (BeautifulSoup + `html.parser` con un dict por fila) contra los
+backends de `table_parser.py` usando una página guardada, por lo que se ejecuta sin red:
+
+    python benchmarks/bench_table_parser.py --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src", "proyecto", "static", "models"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from table_parser import COLUMNS, PARSERS, get_parser  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "yahoo_history_eth.html")
+
+
+def legacy_parse(html):
+    """Ruta original de `DataCollector.fetch_data` (un dict por fila)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table')
+    data = []
+    for row in table.find_all('tr')[1:]:
+        cols = row.find_all('td')
+        if len(cols) >= 6:
+            volume = cols[5].text.replace(',', '').strip()
+            data.append({
+                'date': cols[0].text.strip(),
+                'open': float(cols[1].text.replace(',', '').strip()),
+                'high': float(cols[2].text.replace(',', '').strip()),
+                'low': float(cols[3].text.replace(',', '').strip()),
+                'close': float(cols[4].text.replace(',', '').strip()),
+                'volume': int(volume) if volume.isdigit() else 0
+            })
+    return data
+
+
+def timeit(func, html, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(html)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.fixture, encoding="utf-8") as f:
+        html = f.read()
+
+    baseline, legacy = timeit(legacy_parse, html, args.repeat)
+    expected = {column: [row[column] for row in legacy] for column in COLUMNS}
+    print(f"{'backend':<10}{'filas':>8}{'mejor (ms)':>14}{'speedup':>10}")
+    print(f"{'legacy':<10}{len(legacy):>8}{baseline * 1000:>14.2f}{1.0:>10.2f}")
+
+    for name in PARSERS:
+        try:
+            backend = get_parser(name)
+        except ImportError as e:
+            print(f"{name:<10}  omitido: {e}")
+            continue
+        elapsed, columns = timeit(backend.parse, html, args.repeat)
+        assert columns == expected, f"El backend '{name}' no coincide con la ruta original"
+        print(f"{name:<10}{len(columns['date']):>8}{elapsed * 1000:>14.2f}{baseline / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
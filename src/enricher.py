@@ -2,10 +2,28 @@ import pandas as pd
 import sqlite3
 import logging
 import os
-from datetime import datetime
+import sys
+import argparse
+
+# Módulos compartidos con el dashboard (rollups)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "proyecto", "static", "models"))
+from rollups import ROLLUP_KEYS, build_rollups, table_name
+from csv_stream import export_query
+
+try:
+    import pyarrow
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow es opcional, sin él solo se guardan SQLite y CSV
+    pyarrow = None
+
+# Formatos de fecha aceptados, en el orden en que se prueban
+DATE_FORMATS = ["%B %d, %Y", "%d-%m-%Y", "%Y-%m-%d", "%b %d, %Y", "%d/%m/%Y", "%m/%d/%Y", "%Y-%m-%dT%H:%M:%S.%fZ"]
 
 class DataEnricher:
-    def __init__(self, db_path=None):
+    # Formato que convirtió todas las fechas de una fuente, se prueba primero en las siguientes cargas
+    _format_cache = {}
+
+    def __init__(self, db_path=None, overlap_days=7):
         # Esta es la ruta absoluta de la raíz del proyecto
         self.project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -21,6 +39,14 @@ class DataEnricher:
         
         self.enriched_db_path = os.path.join(self.data_dir, "enriched_historical.db")
         self.csv_path = os.path.join(self.data_dir, "enriched_historical.csv")  # Nueva ruta para CSV
+        self.parquet_path = os.path.join(self.data_dir, "enriched_historical.parquet")  # Copia columnar
+        self.snapshot_path = os.path.join(self.data_dir, "enriched_historical.arrow")  # Instantánea Arrow IPC
+
+        # Días antes de la última fecha enriquecida que se vuelven a procesar (revisiones tardías del collector)
+        self.overlap_days = overlap_days
+
+        # Último error de carga, enriquecimiento o guardado; `run` lo convierte en excepción
+        self.last_error = None
 
         # Configura sistema de logging
         self.logger = logging.getLogger('DataEnricher')
@@ -50,6 +76,7 @@ class DataEnricher:
         try:
             if not os.path.exists(self.db_path):
                 self.logger.error(f"⚠ Archivo de base de datos 'historical.db' no encontrado en: {self.db_path}.")
+                self.last_error = f"no existe {self.db_path}"
                 print(f"⚠ Archivo de base de datos 'historical.db' no encontrado.")
                 return pd.DataFrame()
 
@@ -70,36 +97,62 @@ class DataEnricher:
             return df
         except Exception as e:
             self.logger.error(f"⚠ Error al cargar datos desde la base de datos histórica ({self.db_path}): {e}")
+            self.last_error = f"error al cargar los datos históricos: {e}"
             print(f"⚠ Error al cargar datos desde la base de datos histórica: {e}")
             return pd.DataFrame()
 
+    def parse_dates(self, dates):
+        """Convierte una columna de fechas en texto probando cada formato sobre toda la columna.
+
+        Cada formato se aplica una sola vez de forma vectorizada (`errors='coerce'`) y solo sobre
+        las filas que siguen sin convertir, en el orden de `DATE_FORMATS`. Si un solo formato
+        convierte todas las fechas se guarda por fuente (`db_path`, solo en este proceso) y en la
+        siguiente carga se prueba primero; se acepta únicamente si vuelve a convertir todas las
+        fechas, si no se descarta y se usa el orden original. Así el formato guardado solo decide
+        fechas ambiguas (`%d/%m/%Y` o `%m/%d/%Y`) en una fuente que ya estaba entera en ese formato.
+        """
+        # Cada fecha distinta se convierte una sola vez (se repiten, por ejemplo, entre símbolos)
+        uniques = pd.Index(dates.dropna().unique())
+
+        cached = self._format_cache.get(self.db_path)
+        if cached is not None:
+            converted = pd.to_datetime(uniques, format=cached, errors="coerce")
+            if converted.notna().all():
+                return pd.Series(pd.Series(converted, index=uniques).reindex(dates).to_numpy(), index=dates.index)
+            del self._format_cache[self.db_path]
+
+        parsed = pd.Series(pd.NaT, index=uniques, dtype="datetime64[ns]")
+        pending = uniques
+        for fmt in DATE_FORMATS:
+            if pending.empty:
+                break
+            converted = pd.to_datetime(pending, format=fmt, errors="coerce")
+            matched = converted.notna()
+            if matched.all() and len(pending) == len(uniques):
+                self._format_cache[self.db_path] = fmt
+            parsed[pending[matched]] = converted[matched]
+            pending = pending[~matched]
+
+        return pd.Series(parsed.reindex(dates).to_numpy(), index=dates.index)
+
     def enrich_data(self, df):
         if df.empty:
             self.logger.warning("No hay datos para enriquecer.")
             return pd.DataFrame()
 
         try:
-            # Función para intentar convertir diferentes formatos de fecha
-            def try_parse_date(date_str):
-                formats = ["%B %d, %Y", "%d-%m-%Y", "%Y-%m-%d", "%b %d, %Y", "%d/%m/%Y", "%m/%d/%Y", "%Y-%m-%dT%H:%M:%S.%fZ"]
-                for fmt in formats:
-                    try:
-                        return datetime.strptime(date_str, fmt)
-                    except ValueError:
-                        pass
-                return None
-
-            # Convertimos la columna 'date' al formato datetime
-            df['date'] = df['date'].apply(try_parse_date)
+            # Convertimos la columna 'date' al formato datetime (si no viene ya convertida)
+            if not pd.api.types.is_datetime64_any_dtype(df['date']):
+                df['date'] = self.parse_dates(df['date'])
             df.dropna(subset=['date'], inplace=True)
 
             if df.empty:
                 self.logger.error("⚠ No se pudieron convertir las fechas al formato datetime.")
+                self.last_error = "no se pudieron convertir las fechas"
                 print("⚠ No se pudieron convertir las fechas al formato datetime.")
                 return pd.DataFrame()
 
             # Agregamos columnas de fecha desglosada
-            df['date'] = pd.to_datetime(df['date'])
             df['year'] = df['date'].dt.year
             df['month'] = df['date'].dt.month
             df['day'] = df['date'].dt.day
@@ -110,35 +163,246 @@ class DataEnricher:
             return df
         except Exception as e:
             self.logger.error(f"⚠ Error al enriquecer los datos: {e}")
+            self.last_error = f"error al enriquecer los datos: {e}"
             print(f"⚠ Error al enriquecer los datos: {e}")
             return pd.DataFrame()
 
-    def save_enriched_data(self, df):
+    def get_high_water_mark(self):
+        """Devuelve la última fecha enriquecida (marca de agua) o None si no hay datos enriquecidos."""
+        if not os.path.exists(self.enriched_db_path):
+            return None
+
+        conn = sqlite3.connect(self.enriched_db_path)
+        try:
+            last_date = conn.execute("SELECT MAX(date) FROM enriched_historical").fetchone()[0]
+        except sqlite3.OperationalError:
+            last_date = None
+        finally:
+            conn.close()
+        return pd.Timestamp(last_date) if last_date else None
+
+    def get_enriched_dates(self, before):
+        """Fechas ya enriquecidas anteriores a `before` (para detectar filas antiguas sin enriquecer)."""
+        conn = sqlite3.connect(self.enriched_db_path)
+        try:
+            dates = pd.read_sql_query("SELECT date FROM enriched_historical WHERE date < ?", conn,
+                                      params=[before.strftime('%Y-%m-%d %H:%M:%S')])['date']
+        finally:
+            conn.close()
+        return pd.to_datetime(dates)
+
+    def select_new_rows(self, df, since):
+        """Filtra las filas de origen posteriores a la marca de agua (menos `overlap_days`).
+
+        También se incluyen las filas anteriores cuya fecha todavía no está en `enriched_historical`,
+        por ejemplo las cargadas en bloque con `DataCollector.import_csv`.
+        """
+        df['date'] = self.parse_dates(df['date'])
+        cutoff = since - pd.Timedelta(days=self.overlap_days)
+        recent = df['date'] >= cutoff
+        missing = ~recent & df['date'].notna() & ~df['date'].isin(self.get_enriched_dates(cutoff))
+        new_rows = df[recent | missing].copy()
+        self.logger.info(f"ℹ Marca de agua: {since.date()}, {int(recent.sum())} filas desde {cutoff.date()} "
+                         f"y {int(missing.sum())} anteriores sin enriquecer.")
+        print(f"ℹ {len(new_rows)} filas nuevas o recientes por enriquecer (desde {cutoff.date()}, "
+              f"{int(missing.sum())} anteriores sin enriquecer).")
+        return new_rows
+
+    def save_enriched_data(self, df, incremental=False):
+        """Guarda los datos enriquecidos en SQLite (con sus tablas de rollups) y CSV.
+
+        Con `incremental=True` se hace upsert por fecha en `enriched_historical`. El CSV va de la
+        fecha más reciente a la más antigua, así que siempre se regenera desde la BD (por bloques).
+        Devuelve el número de filas escritas (0 si ya estaban al día o si hubo un error).
+        """
         if df.empty:
             self.logger.warning("No hay datos enriquecidos para guardar.")
             print("⚠ No hay datos enriquecidos para guardar.")
-            return
+            return 0
         
         try:
+            if incremental:
+                return self._upsert_enriched_data(df)
+
             # Guardamos los datos enriquecidos en la base de datos SQLite
             conn = sqlite3.connect(self.enriched_db_path)
             df.to_sql('enriched_historical', conn, if_exists='replace', index=False)
+            with conn:
+                self._update_rollups(conn, df)
             conn.close()
 
-            # Guardamos los datos enriquecidos en formato CSV
-            df.to_csv(self.csv_path, index=False)
+            # Exportamos el CSV por bloques desde la tabla recién guardada
+            self._export_csv_from_db()
+
+            # Guardamos las copias columnares (Parquet e instantánea Arrow) que leen la app y el modelo
+            self._save_columnar(df)
 
             self.logger.info(f"✅ Datos enriquecidos guardados en: {self.enriched_db_path}")
             print(f"✅ Datos enriquecidos guardados en: {self.enriched_db_path}")
             print(f"✅ Datos guardados en formato CSV en: {self.csv_path}")
+            return len(df)
         except Exception as e:
             self.logger.error(f"⚠ Error al guardar los datos enriquecidos: {e}")
+            self.last_error = f"error al guardar los datos enriquecidos: {e}"
             print(f"⚠ Error al guardar los datos enriquecidos: {e}")
+            return 0
+
+    def _upsert_enriched_data(self, df):
+        """Reemplaza por fecha las filas enriquecidas que cambiaron y añade las nuevas en una transacción.
+
+        Devuelve el número de filas escritas (nuevas más actualizadas).
+        """
+        conn = sqlite3.connect(self.enriched_db_path)
+        try:
+            # Solo se escriben las filas nuevas o con valores distintos a los ya enriquecidos
+            # (to_sql guarda las fechas como texto 'YYYY-MM-DD HH:MM:SS')
+            values = ['open', 'high', 'low', 'close', 'volume']
+            existing = pd.read_sql_query("SELECT date, open, high, low, close, volume FROM enriched_historical WHERE date >= ?",
+                                         conn, params=[df['date'].min().strftime('%Y-%m-%d %H:%M:%S')])
+            existing['date'] = pd.to_datetime(existing['date'])
+            merged = df.merge(existing, on='date', how='left', suffixes=('', '_old'), indicator=True)
+            is_new = (merged['_merge'] == 'left_only').to_numpy()
+            is_changed = ~is_new & (merged[values].to_numpy() != merged[[f"{v}_old" for v in values]].to_numpy()).any(axis=1)
+            df = df[is_new | is_changed]
+            if df.empty:
+                print("ℹ Las filas enriquecidas ya están al día.")
+                self._ensure_columnar()
+                return 0
+
+            dates = df['date'][is_changed[is_new | is_changed]].dt.strftime('%Y-%m-%d %H:%M:%S').tolist()
+            with conn:
+                updated = conn.executemany("DELETE FROM enriched_historical WHERE date = ?",
+                                           [(date,) for date in dates]).rowcount
+                df.to_sql('enriched_historical', conn, if_exists='append', index=False)
+                self._update_rollups(conn, since_year=int(df['year'].min()))
+        finally:
+            conn.close()
+
+        inserted = len(df) - updated
+        # Añadir al final rompería el orden descendente del CSV
+        self._export_csv_from_db()
+        self._save_columnar()
+
+        self.logger.info(f"✅ Enriquecimiento incremental: {inserted} filas nuevas, {updated} actualizadas.")
+        print(f"✅ Enriquecimiento incremental: {inserted} filas nuevas, {updated} actualizadas en {self.enriched_db_path}")
+        return len(df)
+
+    def _update_rollups(self, conn, df=None, since_year=None):
+        """Recalcula las tablas de rollups (año, trimestre, mes, día de la semana).
+
+        Con `since_year` solo se recalculan los buckets desde ese año, los únicos afectados por las
+        filas nuevas; si falta alguna tabla se reconstruyen todas desde la tabla enriquecida.
+        """
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if any(table_name(granularity) not in tables for granularity in ROLLUP_KEYS):
+            since_year = None
+
+        if df is None:
+            query = "SELECT * FROM enriched_historical" + ("" if since_year is None else " WHERE year >= ?")
+            df = pd.read_sql_query(query, conn, params=None if since_year is None else [since_year])
+            df['date'] = pd.to_datetime(df['date'])
+
+        for granularity in ROLLUP_KEYS:
+            rollup = build_rollups(df, granularity)
+            if since_year is None:
+                rollup.to_sql(table_name(granularity), conn, if_exists='replace', index=False)
+            else:
+                conn.execute(f"DELETE FROM {table_name(granularity)} WHERE year >= ?", (since_year,))
+                rollup.to_sql(table_name(granularity), conn, if_exists='append', index=False)
+        self.logger.info(f"✅ Rollups actualizados desde el año {since_year or 'inicial'}.")
+
+    def _export_csv_from_db(self):
+        """Regenera el CSV enriquecido leyendo la tabla por bloques con un cursor (más reciente primero).
+
+        Las fechas a medianoche se escriben como 'YYYY-MM-DD' y las líneas terminan en '\\n', igual que `DataFrame.to_csv`.
+        """
+        conn = sqlite3.connect(self.enriched_db_path)
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(enriched_historical)")]
+            select = ["CASE WHEN substr(date, 12) IN ('', '00:00:00') THEN substr(date, 1, 10) ELSE date END AS date"
+                      if column == 'date' else column for column in columns]
+            rows = export_query(conn, f"SELECT {', '.join(select)} FROM enriched_historical ORDER BY date DESC",
+                                self.csv_path, lineterminator="\n")
+        finally:
+            conn.close()
+        self.logger.info(f"✅ CSV enriquecido exportado por bloques: {rows} filas en {self.csv_path}")
+
+    def _ensure_columnar(self):
+        """Escribe el Parquet y la instantánea Arrow si falta alguno (por ejemplo en una ejecución sin filas nuevas)."""
+        if pyarrow is not None and os.path.exists(self.enriched_db_path) and not (
+                os.path.exists(self.parquet_path) and os.path.exists(self.snapshot_path)):
+            self._save_columnar()
+
+    def _save_columnar(self, df=None):
+        """Escribe el Parquet y la instantánea Arrow IPC; sin `df` se exporta la tabla completa de SQLite.
+
+        Las filas se guardan en orden ascendente de fecha, el que espera `TimeIndexedFrame`: así al
+        cargar la instantánea no hay que reordenarla y las columnas siguen siendo vistas del archivo.
+        """
+        if pyarrow is None:
+            self.logger.warning("⚠ pyarrow no está instalado, no se generan los archivos Parquet ni Arrow.")
+            return
+
+        if df is None:
+            conn = sqlite3.connect(self.enriched_db_path)
+            # El texto 'YYYY-MM-DD HH:MM:SS' se ordena igual que la fecha
+            df = pd.read_sql_query("SELECT * FROM enriched_historical ORDER BY date", conn)
+            conn.close()
+            df['date'] = pd.to_datetime(df['date'])
+        elif not df['date'].is_monotonic_increasing:
+            df = df.sort_values('date', kind='stable', ignore_index=True)
+
+        df.to_parquet(self.parquet_path, index=False)
+        self.logger.info(f"✅ Datos enriquecidos guardados en Parquet: {self.parquet_path}")
+        print(f"✅ Datos guardados en formato Parquet en: {self.parquet_path}")
+
+        # La instantánea va sin comprimir para poder mapearla en memoria; se escribe en un archivo
+        # temporal y se reemplaza de forma atómica para no afectar a los procesos que ya la tienen abierta
+        tmp_path = self.snapshot_path + ".tmp"
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, self.snapshot_path)
+        self.logger.info(f"✅ Instantánea Arrow IPC guardada en: {self.snapshot_path}")
+        print(f"✅ Instantánea Arrow IPC guardada en: {self.snapshot_path}")
+
+    def run(self, full_rebuild=False):
+        """Enriquece los datos (por defecto solo las filas posteriores a la marca de agua) y devuelve cuántas filas escribió.
+
+        Lanza RuntimeError si falló la carga, el enriquecimiento o el guardado, para que quien la
+        llama (por ejemplo el pipeline) no lo registre como una ejecución correcta.
+        """
+        self.last_error = None
+        data = self.load_data()
+        if data.empty:
+            self._raise_on_error()
+            return 0
+
+        since = None if full_rebuild else self.get_high_water_mark()
+        if since is not None:
+            data = self.select_new_rows(data, since)
+            if data.empty:
+                print("ℹ No hay filas nuevas por enriquecer.")
+                self._ensure_columnar()
+                return 0
+
+        enriched_data = self.enrich_data(data)
+        written = 0
+        if not enriched_data.empty:
+            written = self.save_enriched_data(enriched_data, incremental=since is not None)
+        self._raise_on_error()
+        return written
+
+    def _raise_on_error(self):
+        if self.last_error is not None:
+            raise RuntimeError(f"El enriquecimiento falló: {self.last_error}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enriquecimiento de los datos históricos")
+    parser.add_argument("--full-rebuild", action="store_true", help="Reconstruye por completo la tabla enriquecida y el CSV")
+    args = parser.parse_args()
+
     enricher = DataEnricher()
-    data = enricher.load_data()
-    if not data.empty:
-        enriched_data = enricher.enrich_data(data)
-        if not enriched_data.empty:
-            enricher.save_enriched_data(enriched_data)
\ No newline at end of file
+    try:
+        enricher.run(full_rebuild=args.full_rebuild)
+    except RuntimeError as e:
+        print(f"⚠ {e}")
+        sys.exit(1)
@@ -0,0 +1,210 @@
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+# Módulos del proyecto (collector, KPIs, modelo) que viven junto al dashboard
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "proyecto", "static", "models")
+sys.path.insert(0, MODELS_DIR)
+DATA_DIR = os.path.abspath(os.path.join(MODELS_DIR, "..", "data"))
+
+from collector import DataCollector  # noqa: E402
+from enricher import DataEnricher, pyarrow  # noqa: E402
+from rollups import ROLLUP_KEYS, table_name  # noqa: E402
+
+STAGES = ("collect", "enrich", "kpis", "model")
+STATE_PATH = os.path.join(DATA_DIR, "pipeline_state.json")
+KPI_CHECKPOINT_PATH = os.path.join(DATA_DIR, "kpi_state.json")
+YAHOO_URL = "https://finance.yahoo.com/quote/ETH-USD/history"
+
+
+def fingerprint(db_path, table, parse_date=None):
+    """Huella de una tabla: número de filas, fecha máxima y hash SHA-256 del contenido ordenado por fecha.
+
+    `parse_date` convierte la fecha guardada (por ejemplo el texto de Yahoo en `historical`) para
+    calcular la máxima; por defecto se compara el texto tal cual. Devuelve None si la tabla no existe.
+    """
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(f"SELECT * FROM {table} ORDER BY date")
+        digest, rows, max_date = hashlib.sha256(), 0, None
+        for row in cursor:
+            digest.update(repr(row).encode("utf-8"))
+            rows += 1
+            date = parse_date(row[0]) if parse_date else row[0]
+            if date is not None and (max_date is None or date > max_date):
+                max_date = date
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    return {"rows": rows, "max_date": None if max_date is None else str(max_date), "hash": digest.hexdigest()}
+
+
+class Pipeline:
+    """Encadena recolección → enriquecimiento → KPIs/rollups → modelo.
+
+    Antes de cada etapa se calcula la huella de sus entradas; si coincide con la de la última
+    ejecución correcta (guardada en `state_path`) la etapa se omite. Por cada etapa se registra el
+    estado, las filas procesadas y el tiempo.
+    """
+
+    def __init__(self, state_path=STATE_PATH, force=(), skip=()):
+        import modeller
+
+        self.state_path = state_path
+        self.force = set(STAGES if "all" in force else force)
+        self.skip = set(skip)
+        self.enricher = DataEnricher()
+        self.historical_db = self.enricher.db_path
+        self.enriched_db = self.enricher.enriched_db_path
+        # Si falta alguna salida de una etapa se vuelve a ejecutar aunque sus entradas no cambien
+        columnar = (self.enricher.parquet_path, self.enricher.snapshot_path) if pyarrow is not None else ()
+        self.outputs = {"enrich": (self.enriched_db,) + columnar, "kpis": (KPI_CHECKPOINT_PATH,),
+                        "model": (modeller.MODEL_PATH,)}
+        self.state = self.load_state()
+
+        self.logger = logging.getLogger("Pipeline")
+        if not self.logger.handlers:
+            handler = logging.FileHandler(os.path.join(MODELS_DIR, "pipeline.log"), encoding="utf-8")
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    # --- Etapas: cada una devuelve el número de filas procesadas ---
+
+    def collect(self):
+        # La fuente es remota y no tiene huella previa; la caché HTTP del collector evita guardar si no cambió
+        collector = DataCollector(url_base=YAHOO_URL)
+        stats = collector.update_data()
+        return 0 if stats is None else stats["inserted"] + stats["updated"]
+
+    def enrich(self):
+        return self.enricher.run()
+
+    def kpis(self):
+        from streaming_kpis import sync_kpi_table
+
+        # Los rollups se actualizan junto con la tabla enriquecida; solo se reconstruyen si falta alguno
+        conn = sqlite3.connect(self.enriched_db)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if any(table_name(granularity) not in tables for granularity in ROLLUP_KEYS):
+                with conn:
+                    self.enricher._update_rollups(conn)
+        finally:
+            conn.close()
+        # Las barras nuevas o revisadas se guardan en la tabla kpi_daily que lee el dashboard
+        return len(sync_kpi_table(self.enriched_db, KPI_CHECKPOINT_PATH))
+
+    def model(self):
+        import modeller
+        from forecast_service import ForecastService
+        from model_refresh import ModelRefresher
+
+        refresher = ModelRefresher()
+        before = refresher.load_state()
+        refresher.refresh(modeller.load_series(DATA_DIR))
+        # Deja calculados en caché los pronósticos que muestra el dashboard
+        ForecastService().forecast()
+        after = refresher.load_state()
+        # Si el modelo ya incluía la última observación, `refresh` no actualiza su estado
+        return 0 if after == before else after.get("new_observations", 0)
+
+    def inputs(self, stage):
+        """Huella de las entradas de `stage` (None para la recolección, que siempre se ejecuta)."""
+        if stage == "collect":
+            return None
+        if stage == "enrich":
+            return fingerprint(self.historical_db, "historical", DataCollector.parse_date)
+        return fingerprint(self.enriched_db, "enriched_historical")
+
+    def outputs_ready(self, stage):
+        """True si existen las salidas de `stage` (para los KPIs, también la tabla kpi_daily al día)."""
+        from streaming_kpis import kpi_table_ready
+
+        if not all(os.path.exists(path) for path in self.outputs[stage]):
+            return False
+        return stage != "kpis" or kpi_table_ready(self.enriched_db)
+
+    def run_stage(self, stage):
+        if stage in self.skip:
+            # El registro de la última ejecución se conserva para comparar huellas la próxima vez
+            print(f"ℹ Etapa {stage}: desactivada")
+            return {"status": "disabled"}
+
+        previous = self.state.get(stage, {})
+        inputs = self.inputs(stage)
+        if (inputs is not None and stage not in self.force and previous.get("status") in ("ok", "skipped")
+                and previous.get("inputs") == inputs and self.outputs_ready(stage)):
+            record = {"status": "skipped", "inputs": inputs, "rows": 0, "wall_time": 0.0}
+        else:
+            start = time.perf_counter()
+            try:
+                rows = getattr(self, stage)()
+                status = "ok"
+            except Exception as e:
+                self.logger.error(f"⚠ Error en la etapa {stage}: {e}")
+                print(f"⚠ Error en la etapa {stage}: {e}")
+                rows, status = 0, f"error: {e}"
+            # Huella de las entradas con las que se ejecutó (la recolección no tiene entradas)
+            record = {"status": status, "inputs": inputs, "rows": rows,
+                      "wall_time": round(time.perf_counter() - start, 3)}
+
+        record["finished_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+        self.state[stage] = record
+        self.save_state()
+        self.logger.info(f"ℹ Etapa {stage}: {record['status']}, {record.get('rows', 0)} filas, "
+                         f"{record.get('wall_time', 0.0):.3f}s")
+        print(f"ℹ Etapa {stage}: {record['status']}")
+        return record
+
+    def run(self):
+        """Ejecuta las etapas en orden; se detiene en la primera que falla. Devuelve los registros por etapa."""
+        records = {}
+        for stage in STAGES:
+            records[stage] = self.run_stage(stage)
+            if records[stage]["status"].startswith("error"):
+                print(f"⚠ El pipeline se detiene: las etapas posteriores a {stage} no se ejecutan.")
+                break
+        return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline completo: recolección → enriquecimiento → KPIs/rollups → modelo")
+    parser.add_argument("--force", nargs="+", default=[], choices=STAGES + ("all",),
+                        help="Etapas que se ejecutan aunque sus entradas no hayan cambiado")
+    parser.add_argument("--skip", nargs="+", default=[], choices=STAGES, help="Etapas que no se ejecutan")
+    parser.add_argument("--state-path", default=STATE_PATH)
+    args = parser.parse_args()
+
+    pipeline = Pipeline(state_path=args.state_path, force=args.force, skip=args.skip)
+    start = time.perf_counter()
+    records = pipeline.run()
+
+    print(f"\n{'etapa':<10}{'estado':<12}{'filas':>8}{'tiempo (s)':>12}")
+    for stage, record in records.items():
+        print(f"{stage:<10}{record['status'][:11]:<12}{record.get('rows', 0):>8}{record.get('wall_time', 0.0):>12.3f}")
+    if any(record["status"].startswith("error") for record in records.values()):
+        print(f"⚠ Pipeline detenido por un error tras {time.perf_counter() - start:.2f}s. Estado en: {args.state_path}")
+        sys.exit(1)
+    print(f"✅ Pipeline completado en {time.perf_counter() - start:.2f}s. Estado en: {args.state_path}")
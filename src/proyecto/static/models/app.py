@@ -1,10 +1,18 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 import plotly.express as px
 import os
 import requests
 import statsmodels.api as sm
+from enriched_store import data_version, load_enriched
+from kpis import attach_kpis
+from streaming_kpis import load_kpi_table
+from time_index import TimeIndexedFrame
+from sections import render_sections, show_timings
+from downsampling import downsample
+from figure_cache import FigureCache
+from rollups import load_rollups, rollup_range
+from forecast_service import ForecastService
 
 # --- Configuración de la página ---
 st.set_page_config(layout="wide", page_title="Dashboard de KPIs Financieros ETH")
@@ -51,85 +59,129 @@ if not os.path.exists(enriched_db_path):
     st.stop()
 
 
-@st.cache_data
+@st.cache_resource(max_entries=1)
 def load_data(path, file_mod_time): # Añadimos file_mod_time como argumento para "romper" la caché
     """
-    Carga los datos desde la base de datos SQLite y convierte la columna 'date' a datetime.
+    Carga los datos enriquecidos con la columna 'date' como datetime: desde la instantánea
+    Arrow mapeada en memoria si existe, si no desde Parquet o SQLite.
+    Se usa cache_resource para compartir el DataFrame (y las páginas mapeadas) entre sesiones
+    en lugar de copiarlo en cada rerun; no debe modificarse en el lugar. Solo se conserva la
+    versión actual (max_entries=1) para liberar el DataFrame y el mapeo de las versiones viejas.
     El argumento file_mod_time se usa para forzar la recarga cuando el archivo cambie.
     """
-    conn = sqlite3.connect(path)
-    df = pd.read_sql_query("SELECT * FROM enriched_historical", conn)
-    conn.close()
-    df["date"] = pd.to_datetime(df["date"])
-    return df
-
-# Obtenemos la última fecha de modificación del archivo para usarla en la caché
-# Esto fuerza a Streamlit a recargar los datos si el archivo .db cambia.
-try:
-    # Obtener el timestamp de la última modificación del archivo
-    file_modification_time = os.path.getmtime(enriched_db_path)
-except FileNotFoundError:
-    # Si el archivo no existe (aún no ha sido descargado en la ejecución actual), usa 0
-    file_modification_time = 0
-
-df = load_data(enriched_db_path, file_modification_time)
+    return load_enriched(os.path.dirname(path))
+
+# Obtenemos la última fecha de modificación de los datos (.db o .parquet) para usarla en la caché
+# Esto fuerza a Streamlit a recargar los datos si alguno de los archivos cambia (0 si no existen).
+file_modification_time = data_version(data_dir_abs)
 
 # --- Cálculo de KPIs financieros ---
 
-df["Price Change %"] = df["close"].pct_change() * 100
-df["Moving Average 30"] = df["close"].rolling(window=30).mean()
-df["Volatility"] = df["close"].rolling(window=30).std()
-df["Cumulative Return"] = (1 + df["close"].pct_change().fillna(0)).cumprod()
-df["Price Range"] = df["high"] - df["low"]
+@st.cache_resource(max_entries=1)
+def load_kpi_data(path, file_mod_time):
+    """
+    Ordena los datos por fecha de forma ascendente y les agrega los KPIs financieros una sola vez
+    por versión de los datos (file_mod_time): los de la tabla kpi_daily que mantiene el pipeline
+    si está al día, si no se calculan. Los reruns de Streamlit reutilizan el resultado
+    y solo cortan el rango de fechas; el DataFrame es compartido y no debe modificarse en el lugar.
+    """
+    # Los KPIs móviles se calculan sobre la serie en orden cronológico
+    return TimeIndexedFrame(attach_kpis(TimeIndexedFrame(load_data(path, file_mod_time)).frame, load_kpi_table(path)))
+
+data = load_kpi_data(enriched_db_path, file_modification_time)
+
+
+@st.cache_resource(max_entries=1)
+def load_rollup_tables(path, file_mod_time):
+    """
+    Tablas de rollups (año, trimestre, mes, día de la semana) que mantiene el enricher.
+    Si la base de datos no las tiene, se calculan una vez por versión de los datos.
+    """
+    return load_rollups(path, load_kpi_data(path, file_mod_time).frame)
+
+rollup_tables = load_rollup_tables(enriched_db_path, file_modification_time)
+
+
+@st.cache_resource
+def get_forecast_service():
+    """
+    Servicio de pronósticos compartido entre sesiones: carga arima_model.json una sola vez y
+    guarda los pronósticos por versión del modelo, así que los reruns no hacen trabajo con el modelo.
+    """
+    return ForecastService()
+
+forecast_service = get_forecast_service()
 
 # --- Configuración del dashboard ---
 st.title("📊 Dashboard de KPIs Financieros de Ethereum (ETH)")
 
 # Filtros de fecha en la barra lateral
 st.sidebar.header("Filtros de Fecha")
-start_date = st.sidebar.date_input("Fecha inicio", df["date"].min().date())
-end_date = st.sidebar.date_input("Fecha fin", df["date"].max().date())
+start_date = st.sidebar.date_input("Fecha inicio", data.start.date())
+end_date = st.sidebar.date_input("Fecha fin", data.end.date())
+
+# Reducción de puntos de las series de tiempo antes de enviarlas al navegador
+st.sidebar.header("Gráficos de Líneas")
+max_points = st.sidebar.number_input(
+    "Puntos máximos por serie (0 = todos)", min_value=0, value=1000, step=100,
+    help="Las series se reducen en el servidor con LTTB (aprox. un punto por píxel de ancho). "
+         "Acota el rango de fechas para ver todos los puntos de un periodo.")
 
 # Filtrar el DataFrame según las fechas seleccionadas
-df_filtered = df[(df["date"] >= pd.to_datetime(start_date)) & (df["date"] <= pd.to_datetime(end_date))]
+df_filtered = data.slice(start_date, end_date)
 
 if df_filtered.empty:
     st.warning("No hay datos para el rango de fechas seleccionado. Por favor, ajusta las fechas.")
     st.stop()
 
 # Asegura que las columnas 'year', 'month', 'day_of_week' existan para los gráficos
-df_filtered_copy = df_filtered.copy()
+# (copia superficial: las columnas nuevas no modifican los datos compartidos en caché)
+df_filtered_copy = df_filtered.copy(deep=False)
 df_filtered_copy['year'] = df_filtered_copy['date'].dt.year
 df_filtered_copy['month'] = df_filtered_copy['date'].dt.month_name()
 df_filtered_copy['day_of_week'] = df_filtered_copy['date'].dt.day_name()
 df_filtered_copy['year_month_day'] = df_filtered_copy['date'].dt.to_period('D')
 
 
-# --- Creación de Pestañas ---
-tab_overview, tab_metrics, tab_trends, tab_individual_kpis, tab_comparative_analysis, tab_distribution, tab_composition = st.tabs([
-    "Resumen General",
-    "Métricas Clave",
-    "Tendencias Globales",
-    "KPIs Individuales",
-    "Análisis Comparativo",
-    "Distribución y Relación",
-    "Composición"
-])
+def series_view(y_columns):
+    """Filas del rango seleccionado reducidas a `max_points` para graficar `y_columns` contra la fecha."""
+    return downsample(df_filtered_copy, "date", y_columns, max_points)
+
+
+@st.cache_resource
+def get_figure_cache():
+    """Caché LRU de figuras compartida entre sesiones y reruns (máximo 128 MB)."""
+    return FigureCache(max_bytes=128 * 2**20)
+
+figure_cache = get_figure_cache()
+
+
+def show_chart(chart_id, build, *params):
+    """
+    Muestra la figura `chart_id`. `build()` solo se ejecuta si la figura no está en caché para
+    el rango de fechas, la versión de los datos y los parámetros extra (KPIs seleccionados,
+    puntos máximos); así cambiar un selectbox no reconstruye los gráficos de las otras pestañas.
+    """
+    key = (chart_id, start_date, end_date, file_modification_time) + params
+    st.plotly_chart(figure_cache.get_or_build(key, build))
+
+
+# --- Secciones del dashboard ---
 
-# Pestaña 1: Resumen General
-with tab_overview:
+# Sección 1: Resumen General
+def section_overview():
     st.header("Resumen del Periodo Seleccionado")
     st.write("Aquí puedes encontrar un resumen de las métricas clave y una visión general de los datos.")
 
     st.subheader("Vista Previa de los Datos Filtrados")
     st.dataframe(df_filtered_copy.head())
 
-    fig_close_price = px.line(df_filtered_copy, x="date", y="close", title="Precio de Cierre a lo largo del tiempo")
-    st.plotly_chart(fig_close_price)
+    show_chart("close_price", lambda: px.line(series_view("close"), x="date", y="close", title="Precio de Cierre a lo largo del tiempo"),
+               max_points)
 
 
-# Pestaña 2: Métricas Clave
-with tab_metrics:
+# Sección 2: Métricas Clave
+def section_metrics():
     st.header("Métricas Clave")
     col1, col2, col3 = st.columns(3)
     col4, col5, col6 = st.columns(3)
@@ -148,18 +200,22 @@ with tab_metrics:
         st.metric("💲 Precio de Cierre Promedio", f"{df_filtered_copy['close'].mean():.2f}")
 
 
-# Pestaña 3: Tendencias Globales
-with tab_trends:
+# Sección 3: Tendencias Globales
+def section_trends():
     st.header("Tendencias Globales de KPIs")
 
-    st.plotly_chart(px.line(df_filtered_copy, x="date", y="Price Change %", title="Tasa de Variación (%) a lo largo del tiempo"))
-    st.plotly_chart(px.line(df_filtered_copy, x="date", y="Moving Average 30", title="Media Móvil (30 días) del Precio de Cierre"))
-    st.plotly_chart(px.line(df_filtered_copy, x="date", y="Volatility", title="Volatilidad (Desviación Estándar Móvil)"))
-    st.plotly_chart(px.line(df_filtered_copy, x="date", y="Cumulative Return", title="Retorno Acumulado del Precio de Cierre"))
+    show_chart("trend_price_change", lambda: px.line(series_view("Price Change %"), x="date", y="Price Change %", title="Tasa de Variación (%) a lo largo del tiempo"),
+               max_points)
+    show_chart("trend_moving_average", lambda: px.line(series_view("Moving Average 30"), x="date", y="Moving Average 30", title="Media Móvil (30 días) del Precio de Cierre"),
+               max_points)
+    show_chart("trend_volatility", lambda: px.line(series_view("Volatility"), x="date", y="Volatility", title="Volatilidad (Desviación Estándar Móvil)"),
+               max_points)
+    show_chart("trend_cumulative_return", lambda: px.line(series_view("Cumulative Return"), x="date", y="Cumulative Return", title="Retorno Acumulado del Precio de Cierre"),
+               max_points)
 
 
-# Pestaña 4: KPIs Individuales
-with tab_individual_kpis:
+# Sección 4: KPIs Individuales
+def section_individual_kpis():
     st.header("Análisis de KPIs Individuales")
 
     kpi_options = {
@@ -174,8 +230,9 @@ with tab_individual_kpis:
     selected_kpi_display = st.selectbox("Selecciona un KPI para ver su tendencia:", list(kpi_options.keys()))
     selected_kpi_column = kpi_options[selected_kpi_display]
 
-    fig_individual = px.line(df_filtered_copy, x="date", y=selected_kpi_column, title=f"Tendencia de {selected_kpi_display}")
-    st.plotly_chart(fig_individual)
+    show_chart("individual_kpi",
+               lambda: px.line(series_view(selected_kpi_column), x="date", y=selected_kpi_column, title=f"Tendencia de {selected_kpi_display}"),
+               selected_kpi_column, max_points)
 
     st.write("---")
     st.subheader("Comparación de KPIs")
@@ -183,148 +240,216 @@ with tab_individual_kpis:
     kpi_compare_2 = st.selectbox("Selecciona el segundo KPI a comparar:", list(kpi_options.keys()), index=1, key='kpi_comp2')
 
     if kpi_compare_1 and kpi_compare_2:
-        fig_comparison = px.line(df_filtered_copy, x="date", y=[kpi_options[kpi_compare_1], kpi_options[kpi_compare_2]],
-                                 title=f"Comparación de {kpi_compare_1} y {kpi_compare_2}")
-        st.plotly_chart(fig_comparison)
+        compare_columns = [kpi_options[kpi_compare_1], kpi_options[kpi_compare_2]]
+        show_chart("kpi_comparison",
+                   lambda: px.line(series_view(compare_columns), x="date", y=compare_columns,
+                                   title=f"Comparación de {kpi_compare_1} y {kpi_compare_2}"),
+                   tuple(compare_columns), max_points)
 
 
-# Pestaña 5: Análisis Comparativo (Gráficos de barras)
-with tab_comparative_analysis:
+# Sección 5: Análisis Comparativo (Gráficos de barras)
+def section_comparative_analysis():
     st.header("Análisis Comparativo (Gráficos de Barras)")
 
-    avg_close_by_year = df_filtered_copy.groupby('year')['close'].mean().reset_index()
-    fig_bar_year = px.bar(avg_close_by_year, x='year', y='close',
-                          title='Precio de Cierre Promedio por Año',
-                          labels={'close': 'Precio Promedio de Cierre', 'year': 'Año'},
-                          color='close', color_continuous_scale=px.colors.sequential.Viridis)
-    st.plotly_chart(fig_bar_year)
-
-    month_order = [
-        'January', 'February', 'March', 'April', 'May', 'June',
-        'July', 'August', 'September', 'October', 'November', 'December'
-    ]
-    avg_vol_by_month = df_filtered_copy.groupby('month')['Volatility'].mean().reindex(month_order).reset_index()
-    fig_bar_month = px.bar(avg_vol_by_month, x='month', y='Volatility',
-                           title='Volatilidad Promedio por Mes',
-                           labels={'Volatility': 'Volatilidad Promedio', 'month': 'Mes'},
-                           color='Volatility', color_continuous_scale=px.colors.sequential.Plasma)
-    st.plotly_chart(fig_bar_month)
-
-    avg_open_by_year = df_filtered_copy.groupby('year')['open'].mean().reset_index()
-    fig_bar_open_year = px.bar(avg_open_by_year, x='year', y='open',
-                               title='Precio de Apertura Promedio por Año',
-                               labels={'open': 'Precio Promedio de Apertura', 'year': 'Año'},
-                               color='open', color_continuous_scale=px.colors.sequential.Greens)
-    st.plotly_chart(fig_bar_open_year)
+    # Los agregados por año salen de los rollups; solo los años parciales de los bordes del rango
+    # se agregan desde las filas
+    def yearly_rollup():
+        return rollup_range(rollup_tables["year"], "year", data, start_date, end_date)
+
+    def build_bar_year():
+        yearly = yearly_rollup()
+        avg_close_by_year = pd.DataFrame({'year': yearly['year'], 'close': yearly['close_sum'] / yearly['close_count']})
+        return px.bar(avg_close_by_year, x='year', y='close',
+                      title='Precio de Cierre Promedio por Año',
+                      labels={'close': 'Precio Promedio de Cierre', 'year': 'Año'},
+                      color='close', color_continuous_scale=px.colors.sequential.Viridis)
+    show_chart("bar_close_by_year", build_bar_year)
+
+    def build_bar_month():
+        month_order = [
+            'January', 'February', 'March', 'April', 'May', 'June',
+            'July', 'August', 'September', 'October', 'November', 'December'
+        ]
+        avg_vol_by_month = df_filtered_copy.groupby('month')['Volatility'].mean().reindex(month_order).reset_index()
+        return px.bar(avg_vol_by_month, x='month', y='Volatility',
+                      title='Volatilidad Promedio por Mes',
+                      labels={'Volatility': 'Volatilidad Promedio', 'month': 'Mes'},
+                      color='Volatility', color_continuous_scale=px.colors.sequential.Plasma)
+    show_chart("bar_volatility_by_month", build_bar_month)
+
+    def build_bar_open_year():
+        yearly = yearly_rollup()
+        avg_open_by_year = pd.DataFrame({'year': yearly['year'], 'open': yearly['open_sum'] / yearly['open_count']})
+        return px.bar(avg_open_by_year, x='year', y='open',
+                      title='Precio de Apertura Promedio por Año',
+                      labels={'open': 'Precio Promedio de Apertura', 'year': 'Año'},
+                      color='open', color_continuous_scale=px.colors.sequential.Greens)
+    show_chart("bar_open_by_year", build_bar_open_year)
 
     st.write("---")
     st.subheader("Gráficos de Barras Horizontales")
 
-    top_5_vol_months = df_filtered_copy.groupby('month')['Volatility'].mean().nlargest(5).reset_index()
-    fig_bar_h_vol = px.bar(top_5_vol_months, x='Volatility', y='month', orientation='h',
-                           title='Top 5 Meses con Mayor Volatilidad Promedio',
-                           labels={'Volatility': 'Volatilidad Promedio', 'month': 'Mes'},
-                           color='Volatility', color_continuous_scale=px.colors.sequential.Burg)
-    fig_bar_h_vol.update_yaxes(categoryorder='total ascending')
-    st.plotly_chart(fig_bar_h_vol)
-
-    last_return_by_year = df_filtered_copy.groupby('year')['Cumulative Return'].last().nlargest(5).reset_index()
-    fig_bar_h_return = px.bar(last_return_by_year, x='Cumulative Return', y='year', orientation='h',
-                              title='Top 5 Años con Mayor Retorno Acumulado',
-                              labels={'Cumulative Return': 'Retorno Acumulado', 'year': 'Año'},
-                              color='Cumulative Return', color_continuous_scale=px.colors.sequential.Blues)
-    fig_bar_h_return.update_yaxes(categoryorder='total ascending')
-    st.plotly_chart(fig_bar_h_return)
-
-
-# Pestaña 6: Distribución de Datos (Histogramas y gráficos de dispersión)
-with tab_distribution:
+    def build_bar_h_vol():
+        top_5_vol_months = df_filtered_copy.groupby('month')['Volatility'].mean().nlargest(5).reset_index()
+        fig_bar_h_vol = px.bar(top_5_vol_months, x='Volatility', y='month', orientation='h',
+                               title='Top 5 Meses con Mayor Volatilidad Promedio',
+                               labels={'Volatility': 'Volatilidad Promedio', 'month': 'Mes'},
+                               color='Volatility', color_continuous_scale=px.colors.sequential.Burg)
+        fig_bar_h_vol.update_yaxes(categoryorder='total ascending')
+        return fig_bar_h_vol
+    show_chart("bar_h_top_volatility_months", build_bar_h_vol)
+
+    def build_bar_h_return():
+        # Retorno acumulado al cierre de cada año = último cierre del año / primer cierre de la serie
+        yearly = yearly_rollup()
+        last_return_by_year = pd.DataFrame({'year': yearly['year'],
+                                            'Cumulative Return': yearly['close_last'] / data.frame['close'].iloc[0]}).nlargest(5, 'Cumulative Return')
+        fig_bar_h_return = px.bar(last_return_by_year, x='Cumulative Return', y='year', orientation='h',
+                                  title='Top 5 Años con Mayor Retorno Acumulado',
+                                  labels={'Cumulative Return': 'Retorno Acumulado', 'year': 'Año'},
+                                  color='Cumulative Return', color_continuous_scale=px.colors.sequential.Blues)
+        fig_bar_h_return.update_yaxes(categoryorder='total ascending')
+        return fig_bar_h_return
+    show_chart("bar_h_top_return_years", build_bar_h_return)
+
+
+# Sección 6: Distribución de Datos (Histogramas y gráficos de dispersión)
+def section_distribution():
     st.header("Distribución y Relación entre Variables")
 
     st.subheader("Histogramas de Distribución")
-    fig_hist_change = px.histogram(df_filtered_copy, x="Price Change %", nbins=50,
-                                   title="Distribución del Porcentaje de Cambio de Precio Diario",
-                                   labels={"Price Change %": "Cambio de Precio (%)"},
-                                   marginal="box",
-                                   color_discrete_sequence=['purple'])
-    st.plotly_chart(fig_hist_change)
-
-    fig_hist_volume = px.histogram(df_filtered_copy, x="volume", nbins=50,
-                                   title="Distribución del Volumen de Trading Diario",
-                                   labels={"volume": "Volumen"},
-                                   marginal="rug",
-                                   color_discrete_sequence=['teal'])
-    st.plotly_chart(fig_hist_volume)
-
-    fig_hist_range = px.histogram(df_filtered_copy, x="Price Range", nbins=50,
-                                   title="Distribución del Rango de Precio Diario (Máximo - Mínimo)",
-                                   labels={"Price Range": "Rango de Precio"},
-                                   marginal="violin",
-                                   color_discrete_sequence=['darkblue'])
-    st.plotly_chart(fig_hist_range)
-
-    fig_hist_close = px.histogram(df_filtered_copy, x="close", nbins=50,
-                                  title="Distribución del Precio de Cierre",
-                                  labels={"close": "Precio de Cierre"},
-                                  marginal="box",
-                                  color_discrete_sequence=['orange'])
-    st.plotly_chart(fig_hist_close)
-
-    fig_hist_ma = px.histogram(df_filtered_copy, x="Moving Average 30", nbins=50,
-                               title="Distribución de la Media Móvil (30 días)",
-                               labels={"Moving Average 30": "Media Móvil"},
-                               marginal="box",
-                               color_discrete_sequence=['gray'])
-    st.plotly_chart(fig_hist_ma)
+    show_chart("hist_price_change", lambda: px.histogram(df_filtered_copy, x="Price Change %", nbins=50,
+                                                         title="Distribución del Porcentaje de Cambio de Precio Diario",
+                                                         labels={"Price Change %": "Cambio de Precio (%)"},
+                                                         marginal="box",
+                                                         color_discrete_sequence=['purple']))
+
+    show_chart("hist_volume", lambda: px.histogram(df_filtered_copy, x="volume", nbins=50,
+                                                   title="Distribución del Volumen de Trading Diario",
+                                                   labels={"volume": "Volumen"},
+                                                   marginal="rug",
+                                                   color_discrete_sequence=['teal']))
+
+    show_chart("hist_price_range", lambda: px.histogram(df_filtered_copy, x="Price Range", nbins=50,
+                                                        title="Distribución del Rango de Precio Diario (Máximo - Mínimo)",
+                                                        labels={"Price Range": "Rango de Precio"},
+                                                        marginal="violin",
+                                                        color_discrete_sequence=['darkblue']))
+
+    show_chart("hist_close", lambda: px.histogram(df_filtered_copy, x="close", nbins=50,
+                                                  title="Distribución del Precio de Cierre",
+                                                  labels={"close": "Precio de Cierre"},
+                                                  marginal="box",
+                                                  color_discrete_sequence=['orange']))
+
+    show_chart("hist_moving_average", lambda: px.histogram(df_filtered_copy, x="Moving Average 30", nbins=50,
+                                                           title="Distribución de la Media Móvil (30 días)",
+                                                           labels={"Moving Average 30": "Media Móvil"},
+                                                           marginal="box",
+                                                           color_discrete_sequence=['gray']))
 
     st.write("---")
     st.subheader("Relación entre Variables (Gráficos de Dispersión)")
-    fig_scatter_close_volume = px.scatter(df_filtered_copy, x="volume", y="close",
-                                          title="Precio de Cierre vs. Volumen de Trading",
-                                          labels={"volume": "Volumen", "close": "Precio de Cierre"},
-                                          trendline="ols",
-                                          color="Price Change %",
-                                          color_continuous_scale=px.colors.sequential.Sunset)
-    st.plotly_chart(fig_scatter_close_volume)
-
-    fig_scatter_vol_range = px.scatter(df_filtered_copy, x="Volatility", y="Price Range",
-                                       title="Volatilidad vs. Rango de Precio Diario",
-                                       labels={"Volatility": "Volatilidad", "Price Range": "Rango de Precio"},
-                                       trendline="ols",
-                                       color="year",
-                                       color_continuous_scale=px.colors.sequential.Rainbow)
-    st.plotly_chart(fig_scatter_vol_range)
-
-    fig_scatter_close_ma = px.scatter(df_filtered_copy, x="date", y="close",
-                                      title="Precio de Cierre vs. Media Móvil (30 días)",
-                                      labels={"close": "Precio de Cierre", "date": "Fecha"},
-                                      color_discrete_sequence=['blue'])
-    fig_scatter_close_ma.add_scatter(x=df_filtered_copy["date"], y=df_filtered_copy["Moving Average 30"],
-                                     mode='lines', name='Media Móvil 30', line=dict(color='red'))
-    st.plotly_chart(fig_scatter_close_ma)
-
-
-# Pestaña 7: Composición (Gráficos de torta)
-with tab_composition:
+    # Las líneas de tendencia OLS reajustan una regresión de statsmodels: solo se calculan al fallar la caché
+    show_chart("scatter_close_volume", lambda: px.scatter(df_filtered_copy, x="volume", y="close",
+                                                          title="Precio de Cierre vs. Volumen de Trading",
+                                                          labels={"volume": "Volumen", "close": "Precio de Cierre"},
+                                                          trendline="ols",
+                                                          color="Price Change %",
+                                                          color_continuous_scale=px.colors.sequential.Sunset))
+
+    show_chart("scatter_volatility_range", lambda: px.scatter(df_filtered_copy, x="Volatility", y="Price Range",
+                                                              title="Volatilidad vs. Rango de Precio Diario",
+                                                              labels={"Volatility": "Volatilidad", "Price Range": "Rango de Precio"},
+                                                              trendline="ols",
+                                                              color="year",
+                                                              color_continuous_scale=px.colors.sequential.Rainbow))
+
+    def build_scatter_close_ma():
+        df_close_ma = series_view(["close", "Moving Average 30"])
+        fig_scatter_close_ma = px.scatter(df_close_ma, x="date", y="close",
+                                          title="Precio de Cierre vs. Media Móvil (30 días)",
+                                          labels={"close": "Precio de Cierre", "date": "Fecha"},
+                                          color_discrete_sequence=['blue'])
+        fig_scatter_close_ma.add_scatter(x=df_close_ma["date"], y=df_close_ma["Moving Average 30"],
+                                         mode='lines', name='Media Móvil 30', line=dict(color='red'))
+        return fig_scatter_close_ma
+    show_chart("scatter_close_ma", build_scatter_close_ma, max_points)
+
+
+# Sección 7: Composición (Gráficos de torta)
+def section_composition():
     st.header("Composición y Proporciones")
 
-    df_filtered_copy['Price Change Direction'] = df_filtered_copy['Price Change %'].apply(lambda x: 'Positivo' if x >= 0 else 'Negativo')
-    price_change_counts = df_filtered_copy['Price Change Direction'].value_counts().reset_index()
-    price_change_counts.columns = ['Direction', 'Count']
-    fig_pie_direction = px.pie(price_change_counts, values='Count', names='Direction',
-                               title='Proporción de Días con Cambio de Precio Positivo/Negativo',
-                               color='Direction',
-                               color_discrete_map={'Positivo':'lightgreen', 'Negativo':'salmon'},
-                               hole=0.3)
-    st.plotly_chart(fig_pie_direction)
-
-    df_filtered_copy['Price Change Quartile'] = pd.qcut(df_filtered_copy['Price Change %'], q=4, labels=['Q1 (Muy Negativo)', 'Q2 (Negativo)', 'Q3 (Positivo)', 'Q4 (Muy Positivo)'], duplicates='drop')
-    quartile_counts = df_filtered_copy['Price Change Quartile'].value_counts().reset_index()
-    quartile_counts.columns = ['Quartile', 'Count']
-    fig_pie_quartile = px.pie(quartile_counts, values='Count', names='Quartile',
-                              title='Distribución de Días por Cuartil de Variación de Precio',
-                              color='Quartile',
-                              color_discrete_map={'Q1 (Muy Negativo)':'darkred', 'Q2 (Negativo)':'lightcoral',
-                                                  'Q3 (Positivo)':'lightgreen', 'Q4 (Muy Positivo)':'darkgreen'},
-                              hole=0.4)
-    st.plotly_chart(fig_pie_quartile)
\ No newline at end of file
+    def build_pie_direction():
+        price_change_direction = df_filtered_copy['Price Change %'].apply(lambda x: 'Positivo' if x >= 0 else 'Negativo')
+        price_change_counts = price_change_direction.value_counts().reset_index()
+        price_change_counts.columns = ['Direction', 'Count']
+        return px.pie(price_change_counts, values='Count', names='Direction',
+                      title='Proporción de Días con Cambio de Precio Positivo/Negativo',
+                      color='Direction',
+                      color_discrete_map={'Positivo':'lightgreen', 'Negativo':'salmon'},
+                      hole=0.3)
+    show_chart("pie_direction", build_pie_direction)
+
+    def build_pie_quartile():
+        price_change_quartile = pd.qcut(df_filtered_copy['Price Change %'], q=4, labels=['Q1 (Muy Negativo)', 'Q2 (Negativo)', 'Q3 (Positivo)', 'Q4 (Muy Positivo)'], duplicates='drop')
+        quartile_counts = price_change_quartile.value_counts().reset_index()
+        quartile_counts.columns = ['Quartile', 'Count']
+        return px.pie(quartile_counts, values='Count', names='Quartile',
+                      title='Distribución de Días por Cuartil de Variación de Precio',
+                      color='Quartile',
+                      color_discrete_map={'Q1 (Muy Negativo)':'darkred', 'Q2 (Negativo)':'lightcoral',
+                                          'Q3 (Positivo)':'lightgreen', 'Q4 (Muy Positivo)':'darkgreen'},
+                      hole=0.4)
+    show_chart("pie_quartile", build_pie_quartile)
+
+
+# Sección 8: Pronóstico del modelo ARIMA
+def section_forecast():
+    st.header("Pronóstico del Precio de Cierre (ARIMA)")
+
+    forecast_path = forecast_service.forecast()
+    if forecast_path is None:
+        st.info("ℹ No hay un modelo entrenado. Ejecuta `python modeller.py` para generar arima_model.json.")
+        return
+
+    st.write(f"Modelo ARIMA{forecast_path.attrs['order']} entrenado con datos hasta el "
+             f"{forecast_path.attrs['last_date']}. Intervalos de confianza al 95%.")
+
+    summary = forecast_service.horizon_summary()
+    for column, row in zip(st.columns(len(summary)), summary.itertuples()):
+        with column:
+            st.metric(f"🔮 A {row.horizon} día(s) ({row.date.date()})", f"{row.forecast:.2f}",
+                      help=f"Intervalo de confianza: {row.lower:.2f} – {row.upper:.2f}")
+
+    def build_forecast_chart():
+        history = data.frame[["date", "close"]].tail(90)
+        fig_forecast = px.line(history, x="date", y="close", title="Precio de Cierre (últimos 90 días) y Pronóstico",
+                               labels={"close": "Precio de Cierre", "date": "Fecha"})
+        fig_forecast.add_scatter(x=forecast_path["date"], y=forecast_path["upper"], mode="lines",
+                                 line=dict(width=0), showlegend=False, name="Límite superior")
+        fig_forecast.add_scatter(x=forecast_path["date"], y=forecast_path["lower"], mode="lines",
+                                 line=dict(width=0), fill="tonexty", fillcolor="rgba(255, 0, 0, 0.15)",
+                                 name="Intervalo de confianza")
+        fig_forecast.add_scatter(x=forecast_path["date"], y=forecast_path["forecast"], mode="lines",
+                                 name="Pronóstico", line=dict(color="red", dash="dash"))
+        return fig_forecast
+    show_chart("forecast", build_forecast_chart, forecast_path.attrs["model_version"])
+
+
+# --- Renderizado de secciones ---
+# En modo diferido solo se ejecuta la sección elegida; con pestañas se ejecutan todas en cada rerun.
+lazy_sections = st.sidebar.checkbox("Calcular solo la sección activa", value=True,
+                                    help="Desactívalo para ver todas las secciones como pestañas (más lento).")
+section_timings = render_sections({
+    "Resumen General": section_overview,
+    "Métricas Clave": section_metrics,
+    "Tendencias Globales": section_trends,
+    "KPIs Individuales": section_individual_kpis,
+    "Análisis Comparativo": section_comparative_analysis,
+    "Distribución y Relación": section_distribution,
+    "Composición": section_composition,
+    "Pronóstico": section_forecast,
+}, lazy=lazy_sections)
+show_timings(section_timings)
@@ -0,0 +1,159 @@
+import argparse
+import itertools
+import logging
+import math
+import os
+import signal
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import modeller
+from modeller import DATA_DIR, MODEL_PATH, MODELS_DIR
+
+logger = logging.getLogger("Modeller")
+
+LEADERBOARD_PATH = os.path.join(MODELS_DIR, "arima_leaderboard.csv")
+CRITERIA = ("aic", "bic", "rmse")
+
+
+class FitTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise FitTimeout()
+
+
+def order_grid(p_values, d_values, q_values):
+    """Órdenes (p, d, q) del más simple al más complejo, para que la parada temprana descarte los más caros."""
+    return sorted(itertools.product(p_values, d_values, q_values), key=lambda order: (sum(order), order))
+
+
+def fit_candidate(values, order, holdout, timeout=None):
+    """Ajusta ARIMA(`order`) sobre `values` sin las últimas `holdout` observaciones.
+
+    Devuelve AIC y BIC del ajuste y el RMSE de las predicciones a un paso sobre el holdout con
+    los parámetros estimados en el entrenamiento (los días faltantes, NaN en `values`, no cuentan
+    en el RMSE). `timeout` (segundos) corta el ajuste con
+    SIGALRM donde está disponible (el proceso del pool ejecuta un ajuste a la vez).
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    use_alarm = bool(timeout) and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    row = {"p": order[0], "d": order[1], "q": order[2], "aic": math.nan, "bic": math.nan, "rmse": math.nan}
+    start = time.perf_counter()
+    try:
+        train = values[:len(values) - holdout] if holdout else values
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            result = ARIMA(train, order=order).fit()
+            row["aic"], row["bic"] = result.aic, result.bic
+            if holdout:
+                predictions = result.apply(values).predict(start=len(train))
+                row["rmse"] = float(np.sqrt(np.nanmean((values[len(train):] - predictions) ** 2)))
+        row["status"] = "ok"
+    except FitTimeout:
+        row["status"] = "timeout"
+    except Exception as e:
+        row["status"] = f"error: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    row["fit_time"] = time.perf_counter() - start
+    return row
+
+
+def grid_search(series, orders, criterion="aic", holdout=60, timeout=60, patience=None, max_workers=None):
+    """Ajusta los órdenes en paralelo (un proceso por núcleo) y devuelve la tabla de posiciones.
+
+    Los candidatos se evalúan sobre la serie diaria con NaN en los días faltantes, la misma que
+    ajusta `fit_and_save`. Con `patience`, la búsqueda se detiene cuando ese número de ajustes
+    seguidos (en orden de llegada) no mejora el mejor `criterion`: los candidatos pendientes quedan
+    como 'cancelled' y los que ya estaban en curso se esperan y entran en la tabla.
+    """
+    if criterion not in CRITERIA:
+        raise ValueError(f"Criterio desconocido: {criterion}. Opciones: {CRITERIA}")
+    if criterion == "rmse" and not holdout:
+        raise ValueError("El criterio 'rmse' necesita un holdout mayor que 0")
+
+    values = np.asarray(modeller.daily(series), dtype=float)
+    rows, best, stale, done = [], math.inf, 0, set()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fit_candidate, values, order, holdout, timeout): order for order in orders}
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            done.add(future)
+            score = row[criterion]
+            if score < best:
+                best, stale = score, 0
+            else:
+                stale += 1
+            print(f"ℹ ARIMA{futures[future]}: {row['status']}, {criterion}={score:.4f} ({row['fit_time']:.2f}s)")
+
+            if patience and stale >= patience:
+                cancelled = [order for f, order in futures.items() if f not in done and f.cancel()]
+                rows.extend({"p": p, "d": d, "q": q, "aic": math.nan, "bic": math.nan, "rmse": math.nan,
+                             "status": "cancelled", "fit_time": 0.0} for p, d, q in cancelled)
+                in_flight = [f for f in futures if f not in done and not f.cancelled()]
+                for f in in_flight:
+                    rows.append(f.result())
+                print(f"ℹ Parada temprana: {patience} ajustes sin mejorar, {len(cancelled)} candidatos cancelados "
+                      f"y {len(in_flight)} en curso incluidos.")
+                break
+
+    leaderboard = pd.DataFrame(rows, columns=["p", "d", "q", "aic", "bic", "rmse", "status", "fit_time"])
+    leaderboard = leaderboard.sort_values(criterion, na_position="last", kind="stable", ignore_index=True)
+    leaderboard.insert(0, "rank", range(1, len(leaderboard) + 1))
+    return leaderboard
+
+
+def fit_and_save(series, order, model_path=MODEL_PATH):
+    """Reajusta el orden ganador sobre la serie completa y lo guarda con `modeller.save`."""
+    start = time.perf_counter()
+    model_fit = modeller.fit(series, order)
+    modeller.save(model_fit, model_path)
+    logger.info(f"✅ ARIMA{order} ajustado en {time.perf_counter() - start:.2f}s y guardado en {model_path}")
+    return model_fit
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Búsqueda en paralelo del orden (p, d, q) del modelo ARIMA")
+    parser.add_argument("--p", type=int, nargs="+", default=[0, 1, 2, 3, 4])
+    parser.add_argument("--d", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--q", type=int, nargs="+", default=[0, 1, 2, 3])
+    parser.add_argument("--criterion", choices=CRITERIA, default="aic", help="Métrica para ordenar los candidatos")
+    parser.add_argument("--holdout", type=int, default=60, help="Últimas observaciones reservadas para el RMSE")
+    parser.add_argument("--timeout", type=float, default=60, help="Segundos máximos por ajuste")
+    parser.add_argument("--patience", type=int, default=None, help="Ajustes seguidos sin mejora antes de detenerse")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo)")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--leaderboard", default=LEADERBOARD_PATH)
+    args = parser.parse_args()
+
+    series = modeller.load_series(args.data_dir)
+    print(f"✅ {len(series)} registros cargados desde la base de datos.")
+
+    start = time.perf_counter()
+    orders = order_grid(args.p, args.d, args.q)
+    leaderboard = grid_search(series, orders, criterion=args.criterion, holdout=args.holdout,
+                              timeout=args.timeout, patience=args.patience, max_workers=args.workers)
+    leaderboard.to_csv(args.leaderboard, index=False)
+    evaluated = int((leaderboard["status"] != "cancelled").sum())
+    print(f"✅ {evaluated} de {len(orders)} candidatos evaluados en {time.perf_counter() - start:.1f}s, tabla en: {args.leaderboard}")
+    print(leaderboard.head(10).to_string(index=False))
+
+    winner = leaderboard.iloc[0]
+    if winner["status"] != "ok":
+        print("⚠ Ningún candidato se ajustó correctamente, no se guarda el modelo.")
+    else:
+        fit_and_save(series, (int(winner["p"]), int(winner["d"]), int(winner["q"])), args.model_path)
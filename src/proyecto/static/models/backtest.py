@@ -0,0 +1,103 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import modeller
+from modeller import DATA_DIR, DEFAULT_ORDER, MODELS_DIR
+
+BACKTEST_PATH = os.path.join(MODELS_DIR, "arima_backtest.csv")
+
+
+def run_folds(values, order, origins, horizon, start_params=None, warm_start=True):
+    """Ejecuta en orden los folds de `origins` (índice del primer valor pronosticado de cada uno).
+
+    Con `warm_start`, cada fold arranca desde los parámetros del fold anterior del mismo bloque,
+    lo que reduce las iteraciones del optimizador porque los orígenes consecutivos son parecidos.
+    """
+    folds = []
+    for origin in origins:
+        start = time.perf_counter()
+        result = modeller.fit(values[:origin], order, start_params)
+        forecast = np.asarray(result.forecast(horizon))
+        if warm_start:
+            start_params = result.params
+        folds.append({
+            "origin": int(origin),
+            "forecast": forecast,
+            "actual": values[origin:origin + horizon],
+            "fit_time": time.perf_counter() - start,
+            "iterations": result.mle_retvals.get("iterations") if result.mle_retvals else None,
+        })
+    return folds
+
+
+def walk_forward(series, order=DEFAULT_ORDER, initial=365, horizon=30, step=30, max_workers=None, warm_start=True):
+    """Backtest walk-forward con origen móvil: ajusta con los datos hasta cada origen y pronostica `horizon` días.
+
+    La serie se lleva a frecuencia diaria como el modelo guardado (`modeller.daily`, NaN en los días
+    faltantes), así que `initial`, `step` y `horizon` son días y los días faltantes no cuentan en los
+    errores. Los orígenes van desde `initial` cada `step` días y se reparten en bloques contiguos,
+    uno por proceso. Un ajuste inicial sobre el primer origen da los parámetros de arranque de
+    todos los bloques. Devuelve (métricas por horizonte, detalle por fold).
+    """
+    series = modeller.daily(series)
+    values = np.asarray(series, dtype=float)
+    origins = np.arange(initial, len(values) - horizon + 1, step)
+    if len(origins) == 0:
+        raise ValueError(f"La serie ({len(values)} datos) es muy corta para initial={initial} y horizon={horizon}")
+
+    max_workers = max_workers or os.cpu_count() or 1
+    seed_params = modeller.fit(values[:origins[0]], order).params if warm_start else None
+    chunks = [chunk for chunk in np.array_split(origins, min(max_workers, len(origins))) if len(chunk)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_folds, values, order, chunk, horizon, seed_params, warm_start)
+                   for chunk in chunks]
+        folds = [fold for future in futures for fold in future.result()]
+
+    errors = np.array([fold["forecast"] - fold["actual"] for fold in folds])
+    metrics = pd.DataFrame({
+        "horizon": np.arange(1, horizon + 1),
+        "rmse": np.sqrt(np.nanmean(errors ** 2, axis=0)),
+        "mae": np.nanmean(np.abs(errors), axis=0),
+        "folds": len(folds),
+    })
+
+    index = getattr(series, "index", None)
+    details = pd.DataFrame({
+        "origin": [index[fold["origin"]] if index is not None else fold["origin"] for fold in folds],
+        "rmse": [float(np.sqrt(np.nanmean((fold["forecast"] - fold["actual"]) ** 2))) for fold in folds],
+        "fit_time": [fold["fit_time"] for fold in folds],
+        "iterations": [fold["iterations"] for fold in folds],
+    })
+    return metrics, details
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest walk-forward del modelo ARIMA con folds en paralelo")
+    parser.add_argument("--order", type=int, nargs=3, default=list(DEFAULT_ORDER), metavar=("P", "D", "Q"))
+    parser.add_argument("--initial", type=int, default=365, help="Días del primer entrenamiento")
+    parser.add_argument("--horizon", type=int, default=30, help="Días pronosticados en cada fold")
+    parser.add_argument("--step", type=int, default=30, help="Días entre orígenes consecutivos")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo)")
+    parser.add_argument("--cold-start", action="store_true", help="Ajusta cada fold desde cero (sin reutilizar parámetros)")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--output", default=BACKTEST_PATH, help="CSV con RMSE y MAE por horizonte")
+    args = parser.parse_args()
+
+    series = modeller.load_series(args.data_dir)
+    print(f"✅ {len(series)} registros cargados desde la base de datos.")
+
+    start = time.perf_counter()
+    metrics, details = walk_forward(series, tuple(args.order), initial=args.initial, horizon=args.horizon,
+                                    step=args.step, max_workers=args.workers, warm_start=not args.cold_start)
+    elapsed = time.perf_counter() - start
+    metrics.to_csv(args.output, index=False)
+
+    print(f"✅ {len(details)} folds de ARIMA{tuple(args.order)} en {elapsed:.1f}s "
+          f"(ajustes: {details['fit_time'].sum():.1f}s, {details['iterations'].mean():.0f} iteraciones en promedio)")
+    print(metrics.iloc[[0, 6, len(metrics) - 1] if len(metrics) > 7 else slice(None)].to_string(index=False))
+    print(f"✅ Métricas por horizonte guardadas en: {args.output}")
@@ -4,12 +4,34 @@ import csv
 import logging
 import os
 import time
-from datetime import datetime
-from bs4 import BeautifulSoup
+import argparse
+from datetime import datetime, timedelta
+from table_parser import COLUMNS, get_parser
+from http_cache import ResponseCache
+import csv_stream
 
 class DataCollector:
-    def __init__(self, url_base):
+    BACKFILL_YEARS = 5
+    # Inserta o actualiza por fecha (lo usan el guardado incremental y la importación de CSV)
+    UPSERT_SQL = '''
+        INSERT INTO historical (date, open, high, low, close, volume)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(date) DO UPDATE SET
+            open = excluded.open,
+            high = excluded.high,
+            low = excluded.low,
+            close = excluded.close,
+            volume = excluded.volume
+    '''
+
+    def __init__(self, url_base, overlap_days=7, parser='auto', session=None, use_cache=True, cache_dir=None):
         self.url_base = url_base
+        # Sesión HTTP reutilizable (mantiene las conexiones abiertas entre peticiones)
+        self.session = session or requests.Session()
+        # Backend de extracción de la tabla ('auto', 'lxml' o 'bs4'), ver table_parser.py
+        self.parser = get_parser(parser)
+        # Días que se vuelven a descargar antes de la última fecha guardada para capturar revisiones tardías
+        self.overlap_days = overlap_days
         self.project_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
         self.static_dir = os.path.join(self.project_dir, "static")
         self.data_dir = os.path.join(self.static_dir, "data")
@@ -23,6 +45,12 @@ class DataCollector:
         self.setup_logger()
         self.ensure_directories()
 
+        # Caché HTTP en disco (ETag/Last-Modified + hash del contenido), ver http_cache.py
+        self.cache = ResponseCache(cache_dir or os.path.join(self.data_dir, "http_cache")) if use_cache else None
+        self.last_fetch_unchanged = False
+        # Respuesta ya procesada que se guarda en la caché cuando sus datos quedan en la BD
+        self.pending_cache = None
+
     def setup_logger(self):
         """Configura el logging para la aplicación."""
         if not os.path.exists(self.models_dir):
@@ -39,61 +67,131 @@ class DataCollector:
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
 
-    def build_dynamic_url(self):
-        """Genera dinámicamente la URL con fechas ajustadas a los últimos 5 años."""
+    def build_dynamic_url(self, start_date=None, url_base=None):
+        """Genera dinámicamente la URL desde `start_date` (timestamp) hasta hoy.
+
+        Si no se indica `start_date` se usan los últimos 5 años.
+        """
+        url_base = url_base or self.url_base
         end_date = int(time.time())
-        start_date = end_date - (5 * 365 * 24 * 60 * 60)
+        if start_date is None:
+            start_date = end_date - (self.BACKFILL_YEARS * 365 * 24 * 60 * 60)
 
-        url = f"{self.url_base}?period1={start_date}&period2={end_date}&interval=1d&filter=history&frequency=1d&includeAdjustedClose=true"
+        url = f"{url_base}?period1={start_date}&period2={end_date}&interval=1d&filter=history&frequency=1d&includeAdjustedClose=true"
         print(f"📌 Usando URL dinámica: {url}")
         return url
 
-    def fetch_data(self):
-        """Obtiene datos de la página web de Yahoo Finance."""
-        url = self.build_dynamic_url()
+    def get_fetch_start(self, full_backfill=False):
+        """Calcula el `period1` de la descarga.
+
+        En modo delta se parte de la última fecha en `historical.db` menos `overlap_days`.
+        Devuelve None (carga completa de 5 años) si se pide explícitamente o si no hay datos.
+        """
+        if full_backfill:
+            return None
+
+        latest_date = self.get_latest_date()
+        if latest_date is None:
+            self.logger.info("ℹ No hay datos previos, se realiza la carga completa de 5 años.")
+            return None
+
+        return self.delta_start(latest_date)
+
+    def delta_start(self, latest_date):
+        """Timestamp de inicio de la ventana delta: `latest_date` menos `overlap_days`."""
+        start = latest_date - timedelta(days=self.overlap_days)
+        self.logger.info(f"ℹ Descarga delta desde {start.strftime('%Y-%m-%d')} "
+                         f"(solapamiento de {self.overlap_days} días).")
+        return int(start.timestamp())
+
+    def fetch_data(self, full_backfill=False):
+        """Obtiene datos de la página web de Yahoo Finance.
+
+        Por defecto solo descarga la ventana delta; `full_backfill=True` descarga los 5 años completos.
+        """
+        url = self.build_dynamic_url(self.get_fetch_start(full_backfill))
         headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers)
+        self.last_fetch_unchanged = False
+        if self.cache:
+            headers.update(self.cache.conditional_headers(url))
+        response = self.session.get(url, headers=headers)
+
+        if response.status_code == 304 and self.cache:
+            self.cache.record_not_modified(url)
+            self.last_fetch_unchanged = True
+            self.logger.info("ℹ La página no cambió (304 Not Modified), se omite el procesamiento.")
+            return None
 
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            table = soup.find('table')
+            if self.cache and self.cache.is_unchanged(url, response):
+                self.last_fetch_unchanged = True
+                self.logger.info("ℹ El contenido es idéntico a la última descarga, se omite el procesamiento.")
+                return None
 
-            if not table:
-                self.logger.error("⚠ No se encontró la tabla en la página.")
+            data = self.parse_html(response.text)
+            if data is None:
                 return None
 
-            data = []
-            for row in table.find_all('tr')[1:]:
-                cols = row.find_all('td')
-                if len(cols) >= 6:
-                    date = cols[0].text.strip()
-                    open_price = cols[1].text.replace(',', '').strip()
-                    high_price = cols[2].text.replace(',', '').strip()
-                    low_price = cols[3].text.replace(',', '').strip()
-                    close_price = cols[4].text.replace(',', '').strip()
-                    volume = cols[5].text.replace(',', '').strip()
-
-                    data.append({
-                        'date': date,
-                        'open': float(open_price),
-                        'high': float(high_price),
-                        'low': float(low_price),
-                        'close': float(close_price),
-                        'volume': int(volume) if volume.isdigit() else 0
-                    })
+            # La página se guarda en caché solo después de guardar sus datos (ver `store_pending_cache`):
+            # si falla la escritura en la BD, la próxima ejecución no debe tomarla como ya procesada
+            self.pending_cache = (url, response) if self.cache else None
+
             self.logger.info("✅ Datos obtenidos correctamente.")
-            print(f"Datos obtenidos: {data}")
+            print(f"Datos obtenidos: {len(data['date'])} filas (parser: {self.parser.name})")
             return data
         else:
             self.logger.error(f"⚠ Error al obtener los datos, código: {response.status_code}")
             return None
 
-    def save_to_db(self, data):
-        """Elimina registros antiguos y guarda datos nuevos en SQLite."""
+    def store_pending_cache(self):
+        """Guarda en la caché HTTP la última página descargada, una vez que sus datos están en la BD."""
+        if self.cache and self.pending_cache:
+            self.cache.store(*self.pending_cache)
+        self.pending_cache = None
+
+    def parse_html(self, html):
+        """Extrae la tabla histórica como columnas (date, open, high, low, close, volume)."""
+        data = self.parser.parse(html)
+        if data is None:
+            self.logger.error("⚠ No se encontró la tabla en la página.")
+        return data
+
+    def get_latest_date(self):
+        """Devuelve la fecha más reciente almacenada en `historical` (o None si no hay datos)."""
+        if not os.path.exists(self.db_path):
+            return None
+
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        try:
+            rows = conn.execute("SELECT date FROM historical").fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        finally:
+            conn.close()
+
+        # Las fechas se guardan como texto ("Jun 15, 2025"), por eso no sirve MAX(date) en SQL
+        parsed = [self.parse_date(row[0]) for row in rows]
+        parsed = [d for d in parsed if d is not None]
+        return max(parsed) if parsed else None
+
+    @staticmethod
+    def parse_date(date_str):
+        """Convierte una fecha de Yahoo Finance ("Jun 15, 2025") a datetime."""
+        for fmt in ("%b %d, %Y", "%B %d, %Y", "%Y-%m-%d"):
+            try:
+                return datetime.strptime(date_str, fmt)
+            except (TypeError, ValueError):
+                pass
+        return None
 
-        # ✅ Asegurar que la tabla `historical` existe
+    @staticmethod
+    def _as_rows(data):
+        """Convierte las columnas obtenidas en tuplas listas para `executemany`."""
+        return list(zip(*(data[column] for column in COLUMNS)))
+
+    @staticmethod
+    def _create_table(cursor):
+        """Asegura que la tabla `historical` exista."""
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS historical (
                 date TEXT PRIMARY KEY, 
@@ -104,45 +202,156 @@ class DataCollector:
                 volume INTEGER
             )
         ''')
-        conn.commit()  # Confirmar la creación de la tabla
-
-        # 🔴 Eliminar registros antiguos antes de insertar datos nuevos
-        cursor.execute("DELETE FROM historical")
-
-        # ✅ Insertar los nuevos datos
-        for entry in data:
-            print(f"📌 Insertando en BD: {entry['date']}")  # Debugging
-            cursor.execute('''
-                INSERT INTO historical (date, open, high, low, close, volume) 
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (entry['date'], entry['open'], entry['high'], entry['low'], entry['close'], entry['volume']))
-        
-        conn.commit()
-        conn.close()
-        self.logger.info("✅ Base de datos actualizada correctamente")
+
+    def save_to_db(self, data, incremental=True):
+        """Guarda los datos en SQLite.
+
+        En modo incremental (por defecto) solo se insertan o actualizan las filas nuevas o
+        modificadas en una única transacción. Con `incremental=False` se reemplaza la tabla completa.
+        Devuelve un diccionario con las filas insertadas, actualizadas y sin cambios.
+        """
+        if not incremental:
+            return self._replace_all(data)
+
+        latest_date = self.get_latest_date()
+        rows = self._as_rows(data)
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            self._create_table(cursor)
+
+            existing = {row[0]: row[1:] for row in cursor.execute(
+                "SELECT date, open, high, low, close, volume FROM historical")}
+
+            inserted, updated, unchanged = [], [], 0
+            for row in rows:
+                stored = existing.get(row[0])
+                if stored is None:
+                    inserted.append(row)
+                elif tuple(stored) != row[1:]:
+                    updated.append(row)
+                else:
+                    unchanged += 1
+
+            # ✅ Upsert de las filas nuevas o modificadas en una sola transacción
+            with conn:
+                cursor.executemany(self.UPSERT_SQL, inserted + updated)
+        finally:
+            conn.close()
+
+        stats = {'inserted': len(inserted), 'updated': len(updated), 'unchanged': unchanged}
+        last_stored = latest_date.strftime('%Y-%m-%d') if latest_date else 'sin datos'
+        self.logger.info(f"✅ Base de datos actualizada (incremental, última fecha previa: {last_stored}): "
+                         f"{stats['inserted']} insertadas, {stats['updated']} actualizadas, "
+                         f"{stats['unchanged']} sin cambios")
+        print(f"✅ Guardado incremental: {stats['inserted']} insertadas, {stats['updated']} actualizadas, "
+              f"{stats['unchanged']} sin cambios")
+        return stats
+
+    def _replace_all(self, data):
+        """Elimina registros antiguos y guarda todos los datos nuevos en SQLite."""
+        rows = self._as_rows(data)
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            self._create_table(cursor)
+
+            # 🔴 Eliminar registros antiguos e insertar los nuevos en una sola transacción
+            with conn:
+                cursor.execute("DELETE FROM historical")
+                cursor.executemany('''
+                    INSERT INTO historical (date, open, high, low, close, volume) 
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+        finally:
+            conn.close()
+
+        self.logger.info(f"✅ Base de datos reemplazada correctamente ({len(rows)} filas)")
         print("✅ Guardado en base de datos con actualización")
+        return {'inserted': len(rows), 'updated': 0, 'unchanged': 0}
+
+    def load_from_db(self):
+        """Lee `historical` completa como columnas, de la fecha más reciente a la más antigua."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM historical").fetchall()
+        finally:
+            conn.close()
+
+        rows.sort(key=lambda row: self.parse_date(row[0]) or datetime.min, reverse=True)
+        return {column: [row[i] for row in rows] for i, column in enumerate(COLUMNS)}
 
-    def save_to_csv(self, data):
-        """Guarda los datos en CSV."""
-        with open(self.csv_path, mode='w', newline='', encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Fecha", "Apertura", "Máximo", "Mínimo", "Cierre", "Volumen"])
-            for entry in data:
-                writer.writerow([entry['date'], entry['open'], entry['high'], entry['low'], entry['close'], entry['volume']])
+    def save_to_csv(self, data=None):
+        """Guarda los datos en CSV; sin `data` exporta `historical` por bloques desde SQLite (más reciente primero)."""
+        if data is None:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                csv_stream.register_date_key(conn)
+                csv_stream.export_query(conn, f"SELECT {', '.join(COLUMNS)} FROM historical ORDER BY date_key(date) DESC",
+                                        self.csv_path, header=csv_stream.SPANISH_HEADER)
+            finally:
+                conn.close()
+        else:
+            with open(self.csv_path, mode='w', newline='', encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(csv_stream.SPANISH_HEADER)
+                writer.writerows(self._as_rows(data))
 
         self.logger.info('✅ Datos guardados correctamente en CSV')
         print("Guardado en CSV")
 
-    def update_data(self):
-        """Proceso completo de actualización."""
-        data = self.fetch_data()
-        if data:
+    def import_csv(self, csv_path, chunk_size=csv_stream.CHUNK_SIZE):
+        """Carga un CSV histórico (encabezado en español o inglés) en `historical` por lotes, con upsert por fecha."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self._create_table(conn.cursor())
+            rows = csv_stream.import_csv(conn, csv_path, self.UPSERT_SQL, chunk_size)
+        finally:
+            conn.close()
+
+        self.logger.info(f"✅ {rows} filas importadas desde {csv_path}")
+        print(f"✅ {rows} filas importadas desde {csv_path} en {self.db_path}")
+        return rows
+
+    def update_data(self, incremental=True, full_backfill=False):
+        """Proceso completo de actualización; devuelve las filas insertadas/actualizadas o None si no se guardó nada."""
+        # Reemplazar la tabla con solo la ventana delta borraría el histórico
+        stats = None
+        data = self.fetch_data(full_backfill=full_backfill or not incremental)
+        if data and data['date']:
             print("Iniciando proceso de guardado/actualización en BD...")
-            self.save_to_db(data)
-            self.save_to_csv(data)
+            stats = self.save_to_db(data, incremental=incremental)
+            self.store_pending_cache()
+            # La descarga delta solo trae los últimos días, el CSV se exporta desde la BD completa
+            self.save_to_csv()
+        elif self.last_fetch_unchanged:
+            print("ℹ Sin cambios desde la última ejecución, no se actualiza la BD ni el CSV.")
         else:
             self.logger.error("⚠ No se pudieron obtener datos, el proceso se detiene.")
 
+        if self.cache:
+            run_stats = dict(self.cache.stats)
+            totals = self.cache.save_stats()
+            self.logger.info(f"ℹ Caché HTTP (ejecución): {run_stats} | acumulado: {totals}")
+            print(f"ℹ Caché HTTP: {run_stats}")
+        return stats
+
 if __name__ == "__main__":
-    collector = DataCollector(url_base="https://finance.yahoo.com/quote/ETH-USD/history")
-    collector.update_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Recolector de datos históricos de Yahoo Finance")
+    parser.add_argument("--full", action="store_true", help="Descarga los 5 años completos en lugar de la ventana delta")
+    parser.add_argument("--replace", action="store_true", help="Reemplaza la tabla completa en lugar del guardado incremental")
+    parser.add_argument("--overlap-days", type=int, default=7, help="Días de solapamiento de la descarga delta")
+    parser.add_argument("--parser", default="auto", choices=["auto", "lxml", "bs4"], help="Backend de extracción de la tabla")
+    parser.add_argument("--no-cache", action="store_true", help="Desactiva la caché HTTP en disco")
+    parser.add_argument("--import-csv", default=None, help="Carga un CSV histórico en la BD (sin descargar) y regenera el CSV")
+    args = parser.parse_args()
+
+    collector = DataCollector(url_base="https://finance.yahoo.com/quote/ETH-USD/history", overlap_days=args.overlap_days,
+                              parser=args.parser, use_cache=not args.no_cache)
+    if args.import_csv:
+        collector.import_csv(args.import_csv)
+        collector.save_to_csv()
+    else:
+        collector.update_data(incremental=not args.replace, full_backfill=args.full)
\ No newline at end of file
@@ -0,0 +1,125 @@
+import csv
+import os
+import unicodedata
+from datetime import datetime
+
+from table_parser import COLUMNS
+
+CHUNK_SIZE = 10000
+SPANISH_HEADER = ["Fecha", "Apertura", "Máximo", "Mínimo", "Cierre", "Volumen"]
+
+# Encabezados aceptados al importar (sin tildes ni mayúsculas): el del CSV del collector y el del enriquecido
+HEADER_ALIASES = {
+    "fecha": "date", "apertura": "open", "maximo": "high", "minimo": "low", "cierre": "close", "volumen": "volume",
+    "date": "date", "open": "open", "high": "high", "low": "low", "close": "close", "volume": "volume",
+}
+DATE_FORMATS = ("%b %d, %Y", "%B %d, %Y", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S")
+
+
+def parse_date(text):
+    """Convierte una fecha de Yahoo ("Jun 15, 2025") o ISO (la del CSV enriquecido) a datetime, o None."""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), fmt)
+        except (AttributeError, ValueError):
+            pass
+    return None
+
+
+def yahoo_date(date):
+    """Fecha en el formato que guarda el collector en `historical` ("Apr 1, 2021")."""
+    return f"{date:%b} {date.day}, {date.year}"
+
+
+def register_date_key(conn):
+    """Registra en la conexión la función SQL `date_key(date)`, que devuelve la fecha en ISO para ordenar.
+
+    Las fechas de `historical` se guardan como texto de Yahoo, que no se ordena cronológicamente;
+    con `ORDER BY date_key(date)` el orden lo hace SQLite sin cargar la tabla en Python.
+    """
+    def date_key(text):
+        date = parse_date(text)
+        return None if date is None else date.isoformat()
+
+    conn.create_function("date_key", 1, date_key, deterministic=True)
+
+
+def export_query(conn, query, csv_path, params=(), header=None, chunk_size=CHUNK_SIZE, lineterminator="\r\n"):
+    """Escribe el resultado de `query` en `csv_path` leyendo el cursor de a `chunk_size` filas.
+
+    Sin `header` se usan los nombres de las columnas de la consulta. El CSV se escribe en un archivo
+    temporal y se reemplaza de forma atómica. Devuelve el número de filas escritas.
+    """
+    cursor = conn.execute(query, params)
+    header = header or [column[0] for column in cursor.description]
+    rows = 0
+    tmp_path = csv_path + ".tmp"
+    with open(tmp_path, mode="w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file, lineterminator=lineterminator)
+        writer.writerow(header)
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            writer.writerows(chunk)
+            rows += len(chunk)
+    os.replace(tmp_path, csv_path)
+    return rows
+
+
+def _normalize(name):
+    name = unicodedata.normalize("NFKD", name.replace("\ufeff", "")).encode("ascii", "ignore").decode("ascii")
+    return name.strip().lower()
+
+
+def _to_number(value, kind=float):
+    value = value.replace(",", "").strip()
+    try:
+        return kind(float(value)) if kind is int else kind(value)
+    except ValueError:
+        return None
+
+
+def read_chunks(csv_path, chunk_size=CHUNK_SIZE):
+    """Lee un CSV histórico (encabezado en español o en inglés) en listas de hasta `chunk_size` filas.
+
+    Cada fila es una tupla (date, open, high, low, close, volume) lista para `executemany`, con la
+    fecha en el formato de `historical`. Las columnas adicionales (por ejemplo las del CSV
+    enriquecido) se ignoran y las filas con fecha no reconocida se omiten.
+    """
+    with open(csv_path, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        header = [HEADER_ALIASES.get(_normalize(name)) for name in next(reader, [])]
+        missing = [column for column in COLUMNS if column not in header]
+        if missing:
+            raise ValueError(f"El CSV {csv_path} no tiene las columnas {missing} (encabezado en español o inglés)")
+        positions = [header.index(column) for column in COLUMNS]
+
+        chunk = []
+        for record in reader:
+            if len(record) < len(header):
+                continue
+            date = parse_date(record[positions[0]])
+            if date is None:
+                continue
+            open_, high, low, close = (_to_number(record[i]) for i in positions[1:5])
+            volume = _to_number(record[positions[5]], int)
+            chunk.append((yahoo_date(date), open_, high, low, close, 0 if volume is None else volume))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def import_csv(conn, csv_path, insert_sql, chunk_size=CHUNK_SIZE):
+    """Carga el CSV en lotes de `executemany` dentro de una sola transacción; devuelve las filas cargadas.
+
+    En memoria solo hay un lote a la vez, así que el consumo no depende del tamaño del archivo.
+    """
+    rows = 0
+    with conn:
+        for chunk in read_chunks(csv_path, chunk_size):
+            conn.executemany(insert_sql, chunk)
+            rows += len(chunk)
+    return rows
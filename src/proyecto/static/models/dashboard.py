@@ -5,6 +5,11 @@ import plotly.express as px
 import os
 import requests
 import statsmodels.api as sm
+from kpis import attach_kpis
+from streaming_kpis import load_kpi_table
+from time_index import TimeIndexedFrame
+from sections import render_sections, show_timings
+from rollups import load_rollups, rollup_range
 
 # --- Configuración de la página ---
 st.set_page_config(layout="wide", page_title="Dashboard de KPIs Financieros ETH")
@@ -43,29 +48,35 @@ if not os.path.exists(enriched_db_path):
 # else: # Eliminado a petición del usuario
 #     st.write("✅ Base de datos disponible.") # Eliminado a petición del usuario
 
-@st.cache_data
-def load_data(path):
+@st.cache_data(max_entries=1)
+def load_data(path, file_mod_time):
     """
-    Carga los datos desde la base de datos SQLite y convierte la columna 'date' a datetime.
+    Carga los datos desde la base de datos SQLite, convierte la columna 'date' a datetime,
+    los ordena por fecha de forma ascendente y les agrega los KPIs financieros una sola vez
+    por versión del archivo (file_mod_time), desde la tabla kpi_daily si está al día.
     """
     conn = sqlite3.connect(path)
     df = pd.read_sql_query("SELECT * FROM enriched_historical", conn)
     conn.close()
     df["date"] = pd.to_datetime(df["date"])
-    return df
+    # Los KPIs móviles se calculan sobre la serie en orden cronológico
+    return TimeIndexedFrame(attach_kpis(TimeIndexedFrame(df).frame, load_kpi_table(path)))
 
-df = load_data(enriched_db_path)
+data = load_data(enriched_db_path, os.path.getmtime(enriched_db_path))
 
-# st.write("✅ Datos cargados correctamente") # Eliminado a petición del usuario
-# st.dataframe(df.head()) # Eliminado a petición del usuario
 
-# --- Cálculo de KPIs financieros ---
+@st.cache_data(max_entries=1)
+def load_rollup_tables(path, file_mod_time):
+    """
+    Tablas de rollups (año, trimestre, mes, día de la semana) que mantiene el enricher.
+    Si la base de datos no las tiene, se calculan una vez por versión del archivo.
+    """
+    return load_rollups(path, load_data(path, file_mod_time).frame)
+
+rollup_tables = load_rollup_tables(enriched_db_path, os.path.getmtime(enriched_db_path))
 
-df["Price Change %"] = df["close"].pct_change() * 100
-df["Moving Average 30"] = df["close"].rolling(window=30).mean()
-df["Volatility"] = df["close"].rolling(window=30).std()
-df["Cumulative Return"] = (1 + df["close"].pct_change().fillna(0)).cumprod()
-df["Price Range"] = df["high"] - df["low"]
+# st.write("✅ Datos cargados correctamente") # Eliminado a petición del usuario
+# st.dataframe(df.head()) # Eliminado a petición del usuario
 
 # st.write("✅ KPIs calculados correctamente!") # Eliminado a petición del usuario
 
@@ -74,42 +85,35 @@ st.title("📊 Dashboard de KPIs Financieros de Ethereum (ETH)")
 
 # Filtros de fecha en la barra lateral
 st.sidebar.header("Filtros de Fecha")
-start_date = st.sidebar.date_input("Fecha inicio", df["date"].min().date())
-end_date = st.sidebar.date_input("Fecha fin", df["date"].max().date())
+start_date = st.sidebar.date_input("Fecha inicio", data.start.date())
+end_date = st.sidebar.date_input("Fecha fin", data.end.date())
 
 # Filtrar el DataFrame según las fechas seleccionadas
-df_filtered = df[(df["date"] >= pd.to_datetime(start_date)) & (df["date"] <= pd.to_datetime(end_date))]
+df_filtered = data.slice(start_date, end_date)
 
 if df_filtered.empty:
     st.warning("No hay datos para el rango de fechas seleccionado. Por favor, ajusta las fechas.")
     st.stop()
 
 # Asegura que las columnas 'year', 'month', 'day_of_week' existan para los gráficos
-df_filtered_copy = df_filtered.copy()
+# (copia superficial: las columnas nuevas no modifican los datos compartidos en caché)
+df_filtered_copy = df_filtered.copy(deep=False)
 df_filtered_copy['year'] = df_filtered_copy['date'].dt.year
 df_filtered_copy['month'] = df_filtered_copy['date'].dt.month_name()
 df_filtered_copy['day_of_week'] = df_filtered_copy['date'].dt.day_name()
 df_filtered_copy['year_month_day'] = df_filtered_copy['date'].dt.to_period('D')
 
 
-# --- Creación de Pestañas ---
-tab_overview, tab_metrics, tab_trends, tab_individual_kpis, tab_comparative_analysis, tab_composition = st.tabs([
-    "Resumen General",
-    "Métricas Clave",
-    "Tendencias Globales",
-    "KPIs Individuales",
-    "Análisis Comparativo",
-    "Composición"
-])
+# --- Secciones del dashboard ---
 
-# Pestaña 1: Resumen General
-with tab_overview:
+# Sección 1: Resumen General
+def section_overview():
     st.header("Resumen del periodo")
     st.write("Aquí puedes encontrar un resumen general de los datos.")
     st.dataframe(df_filtered_copy.head())
 
-# Pestaña 2: Métricas Clave (valores numéricos)
-with tab_metrics:
+# Sección 2: Métricas Clave (valores numéricos)
+def section_metrics():
     st.header("Métricas Clave")
     col1, col2, col3 = st.columns(3)
     col4, col5, col6 = st.columns(3)
@@ -128,8 +132,8 @@ with tab_metrics:
         st.metric("💲 Precio de Cierre Promedio", f"{df_filtered_copy['close'].mean():.2f}")
 
 
-# Pestaña 3: Tendencias Globales (todos los gráficos de línea juntos)
-with tab_trends:
+# Sección 3: Tendencias Globales (todos los gráficos de línea juntos)
+def section_trends():
     st.header("Tendencias Globales de KPIs")
 
     st.plotly_chart(px.line(df_filtered_copy, x="date", y="Price Change %", title="Tasa de Variación (%) a lo largo del tiempo"))
@@ -138,8 +142,8 @@ with tab_trends:
     st.plotly_chart(px.line(df_filtered_copy, x="date", y="Cumulative Return", title="Retorno Acumulado del Precio de Cierre"))
 
 
-# Pestaña 4: KPIs Individuales (un gráfico por KPI, seleccionable o con opciones)
-with tab_individual_kpis:
+# Sección 4: KPIs Individuales (un gráfico por KPI, seleccionable o con opciones)
+def section_individual_kpis():
     st.header("Análisis de KPIs Individuales")
 
     kpi_options = {
@@ -168,11 +172,15 @@ with tab_individual_kpis:
         st.plotly_chart(fig_comparison)
 
 
-# Pestaña 5: Análisis Comparativo
-with tab_comparative_analysis:
+# Sección 5: Análisis Comparativo
+def section_comparative_analysis():
     st.header("Análisis Comparativo")
 
-    avg_close_by_year = df_filtered_copy.groupby('year')['close'].mean().reset_index()
+    # Los agregados por año salen de los rollups; solo los años parciales de los bordes del rango
+    # se agregan desde las filas
+    yearly = rollup_range(rollup_tables["year"], "year", data, start_date, end_date)
+
+    avg_close_by_year = pd.DataFrame({'year': yearly['year'], 'close': yearly['close_sum'] / yearly['close_count']})
     fig_bar_year = px.bar(avg_close_by_year, x='year', y='close',
                           title='Precio de Cierre Promedio por Año',
                           labels={'close': 'Precio Promedio de Cierre', 'year': 'Año'},
@@ -190,7 +198,7 @@ with tab_comparative_analysis:
                            color='Volatility', color_continuous_scale=px.colors.sequential.Plasma)
     st.plotly_chart(fig_bar_month)
 
-    avg_open_by_year = df_filtered_copy.groupby('year')['open'].mean().reset_index()
+    avg_open_by_year = pd.DataFrame({'year': yearly['year'], 'open': yearly['open_sum'] / yearly['open_count']})
     fig_bar_open_year = px.bar(avg_open_by_year, x='year', y='open',
                                title='Precio de Apertura Promedio por Año',
                                labels={'open': 'Precio Promedio de Apertura', 'year': 'Año'},
@@ -208,7 +216,9 @@ with tab_comparative_analysis:
     fig_bar_h_vol.update_yaxes(categoryorder='total ascending')
     st.plotly_chart(fig_bar_h_vol)
 
-    last_return_by_year = df_filtered_copy.groupby('year')['Cumulative Return'].last().nlargest(5).reset_index()
+    # Retorno acumulado al cierre de cada año = último cierre del año / primer cierre de la serie
+    last_return_by_year = pd.DataFrame({'year': yearly['year'],
+                                        'Cumulative Return': yearly['close_last'] / data.frame['close'].iloc[0]}).nlargest(5, 'Cumulative Return')
     fig_bar_h_return = px.bar(last_return_by_year, x='Cumulative Return', y='year', orientation='h',
                               title='Top 5 Años con Mayor Retorno Acumulado',
                               labels={'Cumulative Return': 'Retorno Acumulado', 'year': 'Año'},
@@ -216,8 +226,8 @@ with tab_comparative_analysis:
     fig_bar_h_return.update_yaxes(categoryorder='total ascending')
     st.plotly_chart(fig_bar_h_return)
 
-# Pestaña 6: Composición
-with tab_composition:
+# Sección 6: Composición
+def section_composition():
     st.header("Composición y Proporciones")
 
     df_filtered_copy['Price Change Direction'] = df_filtered_copy['Price Change %'].apply(lambda x: 'Positivo' if x >= 0 else 'Negativo')
@@ -239,4 +249,19 @@ with tab_composition:
                               color_discrete_map={'Q1 (Muy Negativo)':'darkred', 'Q2 (Negativo)':'lightcoral',
                                                   'Q3 (Positivo)':'lightgreen', 'Q4 (Muy Positivo)':'darkgreen'},
                               hole=0.4)
-    st.plotly_chart(fig_pie_quartile)
\ No newline at end of file
+    st.plotly_chart(fig_pie_quartile)
+
+
+# --- Renderizado de secciones ---
+# En modo diferido solo se ejecuta la sección elegida; con pestañas se ejecutan todas en cada rerun.
+lazy_sections = st.sidebar.checkbox("Calcular solo la sección activa", value=True,
+                                    help="Desactívalo para ver todas las secciones como pestañas (más lento).")
+section_timings = render_sections({
+    "Resumen General": section_overview,
+    "Métricas Clave": section_metrics,
+    "Tendencias Globales": section_trends,
+    "KPIs Individuales": section_individual_kpis,
+    "Análisis Comparativo": section_comparative_analysis,
+    "Composición": section_composition,
+}, lazy=lazy_sections)
+show_timings(section_timings)
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+def lttb_indices(x, y, n_out):
+    """Índices de los puntos elegidos por Largest-Triangle-Three-Buckets.
+
+    Conserva el primer y el último punto y, en cada uno de los `n_out - 2` buckets intermedios,
+    el punto que forma el triángulo de mayor área con el punto elegido antes y el promedio del
+    bucket siguiente, lo que preserva la forma visual de la serie.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y, n_out):
+    """Índices del mínimo y el máximo de cada bucket (`n_out // 2` buckets), en orden."""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(int)
+    indices = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            bucket = y[start:end]
+            indices.extend((start + int(np.argmin(bucket)), start + int(np.argmax(bucket))))
+    return np.unique(indices)
+
+
+def downsample(df, x, y_columns, max_points, method="lttb"):
+    """Reduce `df` a unos `max_points` puntos por serie para graficar `y_columns` contra `x`.
+
+    Los índices elegidos para cada serie se unen, así que todas las series del gráfico comparten
+    las mismas filas. Los valores nulos (por ejemplo el arranque de una media móvil) se ignoran.
+    Con `max_points` en 0 o mayor que el número de filas se devuelve `df` sin cambios.
+    """
+    if not max_points or len(df) <= max_points:
+        return df
+
+    if isinstance(y_columns, str):
+        y_columns = [y_columns]
+
+    x_values = df[x].to_numpy()
+    if np.issubdtype(x_values.dtype, np.datetime64):
+        x_values = x_values.astype("datetime64[ns]").astype(np.int64)
+
+    selected = []
+    for column in y_columns:
+        y_values = df[column].to_numpy(dtype=float)
+        valid = np.flatnonzero(~np.isnan(y_values))
+        if method == "lttb":
+            chosen = lttb_indices(x_values[valid], y_values[valid], max_points)
+        elif method == "minmax":
+            chosen = minmax_indices(y_values[valid], max_points)
+        else:
+            raise ValueError(f"Método de reducción desconocido: {method}")
+        selected.append(valid[chosen])
+
+    return df.iloc[np.unique(np.concatenate(selected))]
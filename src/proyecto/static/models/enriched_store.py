@@ -0,0 +1,102 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional, sin él se lee desde SQLite
+    pa = pq = None
+
+DB_NAME = "enriched_historical.db"
+PARQUET_NAME = "enriched_historical.parquet"
+SNAPSHOT_NAME = "enriched_historical.arrow"
+
+
+def _timestamp(value):
+    return pd.Timestamp(value) if value is not None else None
+
+
+def load_from_snapshot(path, columns=None):
+    """Abre la instantánea Arrow IPC mapeada en memoria, sin copiar los datos.
+
+    Las columnas numéricas y de fecha sin nulos quedan como vistas de solo lectura sobre el
+    archivo, así que varios procesos que lo abran comparten las mismas páginas de la caché del SO.
+    """
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    if columns:
+        table = table.select(columns)
+    return table.to_pandas(split_blocks=True)
+
+
+def load_from_parquet(path, columns=None, start=None, end=None):
+    """Lee el Parquet enriquecido con proyección de columnas y filtro de fechas (predicate pushdown)."""
+    filters = []
+    if start is not None:
+        filters.append(('date', '>=', _timestamp(start)))
+    if end is not None:
+        filters.append(('date', '<=', _timestamp(end)))
+
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+    return table.to_pandas()
+
+
+def load_from_sqlite(path, columns=None, start=None, end=None):
+    """Lee `enriched_historical` desde SQLite seleccionando solo las columnas y fechas pedidas."""
+    select = ", ".join(f'"{column}"' for column in columns) if columns else "*"
+    where, params = [], []
+    # Las fechas se guardan como texto 'YYYY-MM-DD HH:MM:SS', que se ordena igual que la fecha
+    if start is not None:
+        where.append("date >= ?")
+        params.append(_timestamp(start).strftime('%Y-%m-%d %H:%M:%S'))
+    if end is not None:
+        where.append("date <= ?")
+        params.append(_timestamp(end).strftime('%Y-%m-%d %H:%M:%S'))
+
+    query = f"SELECT {select} FROM enriched_historical"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+
+    conn = sqlite3.connect(path)
+    try:
+        df = pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+def load_enriched(data_dir, columns=None, start=None, end=None, backend="auto"):
+    """Carga los datos enriquecidos desde el mejor backend disponible.
+
+    `backend` puede ser 'auto', 'snapshot' (Arrow IPC mapeado en memoria), 'parquet' o 'sqlite'.
+    En modo 'auto' se usa la instantánea Arrow si no hay filtro de fechas, si no Parquet, y SQLite
+    cuando pyarrow no está instalado o no existen esos archivos. `columns` limita las columnas
+    leídas y `start`/`end` el rango de fechas.
+    """
+    parquet_path = os.path.join(data_dir, PARQUET_NAME)
+    snapshot_path = os.path.join(data_dir, SNAPSHOT_NAME)
+    if backend == "auto":
+        if pa is not None and start is None and end is None and os.path.exists(snapshot_path):
+            backend = "snapshot"
+        elif pa is not None and os.path.exists(parquet_path):
+            backend = "parquet"
+        else:
+            backend = "sqlite"
+
+    if backend == "snapshot":
+        return load_from_snapshot(snapshot_path, columns)
+    if backend == "parquet":
+        return load_from_parquet(parquet_path, columns, start, end)
+    if backend == "sqlite":
+        return load_from_sqlite(os.path.join(data_dir, DB_NAME), columns, start, end)
+    raise ValueError(f"Backend de almacenamiento desconocido: {backend}")
+
+
+def data_version(data_dir):
+    """Marca de versión de los datos enriquecidos (fecha de modificación más reciente)."""
+    paths = [os.path.join(data_dir, name) for name in (DB_NAME, PARQUET_NAME, SNAPSHOT_NAME)]
+    return max((os.path.getmtime(path) for path in paths if os.path.exists(path)), default=0)
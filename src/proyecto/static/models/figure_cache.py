@@ -0,0 +1,48 @@
+import threading
+from collections import OrderedDict
+
+
+class FigureCache:
+    """Caché LRU de figuras de Plotly con un límite de memoria.
+
+    El tamaño de cada figura se estima con la longitud de su JSON (lo mismo que se envía al
+    navegador). Al superar `max_bytes` se descartan las figuras usadas hace más tiempo.
+    Es segura entre hilos, ya que Streamlit atiende cada sesión en un hilo distinto.
+    """
+
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """Devuelve la figura guardada para `key` o la construye con `build()` y la guarda."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+
+        figure = build()
+        size = len(figure.to_json())
+        with self._lock:
+            self.misses += 1
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (figure, size)
+                self.total_bytes += size
+                while self.total_bytes > self.max_bytes:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self.total_bytes -= evicted_size
+        return figure
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    @property
+    def stats(self):
+        return {'figures': len(self._entries), 'bytes': self.total_bytes, 'hits': self.hits, 'misses': self.misses}
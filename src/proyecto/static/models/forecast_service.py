@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import threading
+
+import pandas as pd
+
+import modeller
+from modeller import MODEL_PATH, MODELS_DIR
+
+HORIZONS = (1, 7, 30)
+CACHE_PATH = os.path.join(MODELS_DIR, "arima_forecasts.json")
+
+
+class ForecastService:
+    """Pronósticos del modelo guardado para varios horizontes con caché en memoria y en disco.
+
+    El modelo se carga una sola vez y se vuelve a cargar solo si cambia el archivo. Todos los
+    horizontes salen de una única llamada a `get_forecast` hasta el horizonte más largo y el
+    resultado se guarda por (versión del modelo, alpha) junto con los pasos calculados; una entrada
+    más corta que el horizonte pedido se vuelve a calcular. Las consultas repetidas no hacen trabajo
+    con el modelo.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, cache_path=CACHE_PATH, horizons=HORIZONS):
+        self.model_path = model_path
+        self.cache_path = cache_path
+        self.horizons = tuple(sorted(horizons))
+        self._model = None
+        self._model_version = None
+        self._lock = threading.Lock()
+        self._cache = self._read_cache()
+
+    def model_version(self):
+        """Versión del modelo guardado (tamaño y fecha de modificación del archivo) o None si no existe."""
+        if not os.path.exists(self.model_path):
+            return None
+        stat = os.stat(self.model_path)
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    def _read_cache(self):
+        if self.cache_path and os.path.exists(self.cache_path):
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def _write_cache(self):
+        if self.cache_path:
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f)
+            os.replace(tmp_path, self.cache_path)
+
+    def _load_model(self, version):
+        if self._model is None or self._model_version != version:
+            self._model = modeller.load(self.model_path)
+            self._model_version = version
+        return self._model
+
+    def forecast(self, alpha=0.05):
+        """Trayectoria diaria hasta el horizonte más largo con intervalos al (1 - alpha).
+
+        Devuelve un DataFrame con `horizon`, `date`, `forecast`, `lower` y `upper` (una fila por día),
+        o None si no hay un modelo guardado.
+        """
+        version = self.model_version()
+        if version is None:
+            return None
+
+        steps = self.horizons[-1]
+        key = f"{version}|{alpha}"
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry.get("steps", 0) < steps:
+                model_fit = self._load_model(version)
+                last_date = str(pd.Timestamp(model_fit.model.data.row_labels[-1]).date())
+                path = modeller.forecast(model_fit, steps=steps, alpha=alpha)
+                entry = {
+                    "model_version": version,
+                    "last_date": last_date,
+                    "alpha": alpha,
+                    "steps": steps,
+                    "order": list(model_fit.model.order),
+                    "forecast": {
+                        "horizon": list(range(1, len(path) + 1)),
+                        "date": [str(pd.Timestamp(date).date()) for date in path.index],
+                        "forecast": path["forecast"].tolist(),
+                        "lower": path["lower"].tolist(),
+                        "upper": path["upper"].tolist(),
+                    },
+                }
+                # Se conserva solo la entrada de la versión actual de cada alpha
+                self._cache = {key: e for key, e in self._cache.items() if e["model_version"] == version}
+                self._cache[key] = entry
+                self._write_cache()
+
+        result = pd.DataFrame(entry["forecast"]).head(steps)
+        result["date"] = pd.to_datetime(result["date"])
+        result.attrs.update(last_date=entry["last_date"], order=tuple(entry["order"]), model_version=version)
+        return result
+
+    def horizon_summary(self, alpha=0.05):
+        """Filas del pronóstico en los horizontes configurados (por defecto 1, 7 y 30 días)."""
+        path = self.forecast(alpha)
+        if path is None:
+            return None
+        summary = path[path["horizon"].isin(self.horizons)].reset_index(drop=True)
+        summary.attrs.update(path.attrs)
+        return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcula y guarda en caché los pronósticos del modelo ARIMA")
+    parser.add_argument("--horizons", type=int, nargs="+", default=list(HORIZONS))
+    parser.add_argument("--alpha", type=float, default=0.05, help="Nivel de significancia de los intervalos")
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--cache-path", default=CACHE_PATH)
+    args = parser.parse_args()
+
+    service = ForecastService(model_path=args.model_path, cache_path=args.cache_path, horizons=args.horizons)
+    summary = service.horizon_summary(args.alpha)
+    if summary is None:
+        print(f"⚠ No se encontró el modelo en {args.model_path}. Ejecuta modeller.py para entrenarlo.")
+    else:
+        print(f"✅ Pronósticos de ARIMA{summary.attrs['order']} desde {summary.attrs['last_date']}:")
+        print(summary.to_string(index=False))
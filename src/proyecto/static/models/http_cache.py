@@ -0,0 +1,126 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Parámetros de la URL que cambian entre ejecuciones y no identifican el recurso: la ventana
+# delta (`period1`) avanza con la última fecha guardada y `period2` es la hora de la descarga
+VOLATILE_PARAMS = ('period1', 'period2')
+
+
+class ResponseCache:
+    """Caché en disco de respuestas HTTP con peticiones condicionales.
+
+    Por cada recurso guarda los encabezados ETag/Last-Modified, el hash SHA-256 del contenido
+    y el cuerpo comprimido con gzip; cada recurso tiene una sola entrada, que se reemplaza con
+    la última respuesta. Lleva contadores de aciertos y fallos que se acumulan en `stats.json`
+    dentro del directorio de la caché.
+
+    La caché solo dura lo que dure el directorio: el workflow de GitHub Actions no conserva ni
+    commitea `http_cache/`, así que en CI cada ejecución empieza sin caché.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.stats_path = os.path.join(self.cache_dir, "stats.json")
+        self.stats = {'not_modified': 0, 'hash_hits': 0, 'misses': 0, 'bytes_downloaded': 0, 'bytes_saved': 0}
+
+    @staticmethod
+    def cache_key(url):
+        """Normaliza la URL quitando los parámetros volátiles (`period1` y `period2`)."""
+        parts = urlsplit(url)
+        query = [(k, v) for k, v in parse_qsl(parts.query) if k not in VOLATILE_PARAMS]
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    def _paths(self, url):
+        digest = hashlib.sha1(self.cache_key(url).encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, digest)
+        return base + ".json", base + ".html.gz"
+
+    def _load_meta(self, url):
+        meta_path, _ = self._paths(url)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def conditional_headers(self, url):
+        """Encabezados `If-None-Match` / `If-Modified-Since` para la última respuesta guardada."""
+        meta = self._load_meta(url)
+        if not meta:
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def record_not_modified(self, url):
+        """Registra una respuesta 304: no se descargó ni se procesará el cuerpo."""
+        meta = self._load_meta(url) or {}
+        self.stats['not_modified'] += 1
+        self.stats['bytes_saved'] += meta.get('size', 0)
+
+    def is_unchanged(self, url, response):
+        """Compara el hash de una respuesta 200 con el guardado y actualiza los contadores."""
+        body = response.content
+        self.stats['bytes_downloaded'] += len(body)
+
+        meta = self._load_meta(url)
+        if meta and meta.get('sha256') == hashlib.sha256(body).hexdigest():
+            self.stats['hash_hits'] += 1
+            return True
+
+        self.stats['misses'] += 1
+        return False
+
+    def store(self, url, response):
+        """Guarda una respuesta 200 ya procesada (cuerpo comprimido y metadatos)."""
+        body = response.content
+        content_hash = hashlib.sha256(body).hexdigest()
+        meta_path, body_path = self._paths(url)
+        with gzip.open(body_path, "wb") as f:
+            f.write(body)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({
+                'key': self.cache_key(url),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'sha256': content_hash,
+                'size': len(body),
+            }, f)
+        self._evict_superseded(url, meta_path)
+
+    def _evict_superseded(self, url, meta_path):
+        """Borra las entradas del mismo recurso guardadas con otra clave (por ejemplo con `period1`)."""
+        key = self.cache_key(url)
+        for path in glob.glob(os.path.join(self.cache_dir, "*.json")):
+            if path in (meta_path, self.stats_path):
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    stored_key = json.load(f).get('key')
+            except (OSError, ValueError):
+                continue
+            if stored_key and self.cache_key(stored_key) == key:
+                os.remove(path)
+                body_path = path[:-len(".json")] + ".html.gz"
+                if os.path.exists(body_path):
+                    os.remove(body_path)
+
+    def save_stats(self):
+        """Acumula los contadores de esta ejecución en `stats.json`, los reinicia y devuelve el total."""
+        totals = dict.fromkeys(self.stats, 0)
+        if os.path.exists(self.stats_path):
+            with open(self.stats_path, encoding="utf-8") as f:
+                totals.update(json.load(f))
+        for key, value in self.stats.items():
+            totals[key] += value
+            self.stats[key] = 0
+        with open(self.stats_path, "w", encoding="utf-8") as f:
+            json.dump(totals, f, indent=2)
+        return totals
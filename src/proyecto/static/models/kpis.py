@@ -0,0 +1,30 @@
+KPI_COLUMNS = ["Price Change %", "Moving Average 30", "Volatility", "Cumulative Return", "Price Range"]
+
+
+def add_kpis(df, window=30):
+    """Devuelve una copia superficial de `df` con las columnas de KPIs financieros calculadas.
+
+    Las columnas originales no se copian ni se modifican, por lo que `df` puede ser el
+    DataFrame compartido en la caché de Streamlit.
+    """
+    df = df.copy(deep=False)
+    price_change = df["close"].pct_change()
+    df["Price Change %"] = price_change * 100
+    df["Moving Average 30"] = df["close"].rolling(window=window).mean()
+    df["Volatility"] = df["close"].rolling(window=window).std()
+    df["Cumulative Return"] = (1 + price_change.fillna(0)).cumprod()
+    df["Price Range"] = df["high"] - df["low"]
+    return df
+
+
+def attach_kpis(df, kpi_table=None, window=30):
+    """Como `add_kpis`, pero toma las columnas de `kpi_table` (los KPIs que guarda el pipeline) si
+    tiene exactamente las mismas fechas que `df` (en orden cronológico); si no, las calcula.
+    """
+    if (kpi_table is None or window != 30 or len(kpi_table) != len(df)
+            or not (kpi_table["date"].to_numpy() == df["date"].to_numpy()).all()):
+        return add_kpis(df, window)
+    df = df.copy(deep=False)
+    for column in KPI_COLUMNS:
+        df[column] = kpi_table[column].to_numpy()
+    return df
@@ -0,0 +1,164 @@
+import datetime
+import hashlib
+import json
+import os
+
+FORMAT = "arima-artifact"
+FORMAT_VERSION = 1
+TAIL = 30
+
+
+def _float_list(values):
+    """Lista JSON de floats con los NaN como null."""
+    return [None if v != v else float(v) for v in values]
+
+
+def series_fingerprint(values, previous_hash=None):
+    """Hash SHA-256 de los valores de la serie de entrenamiento (identifica la versión de los datos).
+
+    Con `previous_hash` se encadena: el hash de la serie anterior seguido de los valores añadidos.
+    """
+    import numpy as np
+
+    digest = hashlib.sha256()
+    if previous_hash is not None:
+        digest.update(previous_hash.encode("ascii"))
+    digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def to_artifact(model_fit, metadata=None, tail=TAIL):
+    """Describe un ARIMA ajustado con lo mínimo para pronosticar y extenderlo.
+
+    Guarda el orden, los parámetros, el estado predicho (media y covarianza) en la observación
+    `n - tail` y las últimas `tail` observaciones: al volver a filtrar esas observaciones desde
+    ese estado se obtiene exactamente el mismo estado final que con la serie completa.
+    """
+    import numpy as np
+
+    model = model_fit.model
+    endog = np.asarray(model.endog).ravel()
+    nobs = len(endog)
+    start = max(nobs - tail, 0)
+    index = model.data.row_labels
+    has_dates = hasattr(index, "freqstr") and index.freqstr is not None
+    # Un modelo reconstruido desde un artefacto solo tiene la cola: la ventana de entrenamiento
+    # se toma del artefacto original y se extiende con las observaciones añadidas
+    previous = getattr(model_fit, "artifact_metadata", None) or {}
+    total_nobs = previous.get("nobs", previous.get("tail_nobs", nobs)) - previous.get("tail_nobs", nobs) + nobs
+    if previous:
+        # El AIC de la cola vuelta a filtrar no es comparable: se conserva el del ajuste completo
+        # (los parámetros no cambian) y el hash se encadena con las observaciones añadidas
+        added = endog[previous.get("tail_nobs", nobs):]
+        data_hash = (series_fingerprint(added, previous["data_hash"]) if previous.get("data_hash") and len(added)
+                     else previous.get("data_hash"))
+        aic = previous.get("aic")
+    else:
+        data_hash, aic = series_fingerprint(endog), float(model_fit.aic)
+
+    return {
+        "format": FORMAT,
+        "format_version": FORMAT_VERSION,
+        "order": list(model.order),
+        "seasonal_order": list(model.seasonal_order),
+        "trend": model.trend,
+        "param_names": list(model.param_names),
+        "params": _float_list(np.asarray(model_fit.params)),
+        "state": {
+            "mean": _float_list(model_fit.predicted_state[:, start]),
+            "cov": [_float_list(row) for row in model_fit.predicted_state_cov[:, :, start]],
+        },
+        "tail": {
+            "name": model.endog_names,
+            "start": str(index[start]) if has_dates else None,
+            "freq": index.freqstr if has_dates else None,
+            "values": _float_list(endog[start:]),
+        },
+        "metadata": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "training_start": previous.get("training_start") or (str(index[0]) if has_dates else None),
+            "training_end": str(index[-1]) if has_dates else None,
+            "nobs": total_nobs,
+            "data_hash": data_hash,
+            "aic": aic,
+            **(metadata or {}),
+        },
+    }
+
+
+def save_artifact(model_fit, path, metadata=None, tail=TAIL):
+    """Escribe el artefacto JSON de forma atómica (archivo temporal + `os.replace`)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(to_artifact(model_fit, metadata, tail), f)
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path):
+    with open(path, encoding="utf-8") as f:
+        artifact = json.load(f)
+    if artifact.get("format") != FORMAT or artifact.get("format_version", 0) > FORMAT_VERSION:
+        raise ValueError(f"Formato de artefacto no soportado en {path}: "
+                         f"{artifact.get('format')} v{artifact.get('format_version')}")
+    return artifact
+
+
+def from_artifact(artifact):
+    """Reconstruye un resultado de ARIMA capaz de pronosticar (`get_forecast`) y extenderse (`append`)."""
+    import numpy as np
+    import pandas as pd
+    from statsmodels.tsa.arima.model import ARIMA
+
+    tail = artifact["tail"]
+    values = np.array(tail["values"], dtype=float)
+    if tail["start"] is not None:
+        endog = pd.Series(values, index=pd.date_range(tail["start"], periods=len(values), freq=tail["freq"]),
+                          name=tail["name"])
+    else:
+        endog = values
+
+    initial_state = (np.array(artifact["state"]["mean"], dtype=float), np.array(artifact["state"]["cov"], dtype=float))
+    model = ARIMA(endog, order=tuple(artifact["order"]), seasonal_order=tuple(artifact["seasonal_order"]),
+                  trend=artifact["trend"])
+    model.initialize_known(*initial_state)
+    results = model.filter(np.array(artifact["params"], dtype=float))
+    results.artifact_initial_state = initial_state
+    results.artifact_metadata = dict(artifact["metadata"], tail_nobs=len(values))
+    return results
+
+
+def append(results, new):
+    """Extiende `results` con las observaciones `new` sin reestimar los parámetros.
+
+    `results.append` clona el modelo sin la inicialización conocida, así que en un modelo
+    reconstruido desde un artefacto volvería a filtrar la cola desde la inicialización por defecto.
+    Aquí se filtra cola + observaciones nuevas desde el estado guardado, que da el mismo resultado
+    que extender el modelo original. Los modelos que no vienen de un artefacto usan `append`.
+    """
+    if not hasattr(results, "artifact_initial_state"):
+        return results.append(new)
+
+    import numpy as np
+    import pandas as pd
+    from statsmodels.tsa.arima.model import ARIMA
+
+    model = results.model
+    values = np.asarray(model.endog).ravel()
+    index = model.data.row_labels
+    if hasattr(index, "freqstr") and index.freqstr is not None:
+        endog = pd.concat([pd.Series(values, index=index, name=model.endog_names),
+                           pd.Series(np.asarray(new, dtype=float), index=new.index, name=model.endog_names)])
+        endog = endog.asfreq(index.freqstr)
+    else:
+        endog = np.concatenate([values, np.asarray(new, dtype=float)])
+
+    extended_model = ARIMA(endog, order=model.order, seasonal_order=model.seasonal_order, trend=model.trend)
+    extended_model.initialize_known(*results.artifact_initial_state)
+    extended = extended_model.filter(np.asarray(results.params))
+    extended.artifact_initial_state = results.artifact_initial_state
+    extended.artifact_metadata = results.artifact_metadata
+    return extended
+
+
+def load_artifact(path):
+    return from_artifact(read_artifact(path))
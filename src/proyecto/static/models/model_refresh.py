@@ -0,0 +1,170 @@
+import argparse
+import json
+import logging
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import model_artifact
+import modeller
+from modeller import DATA_DIR, DEFAULT_ORDER, MODEL_PATH, MODELS_DIR
+
+logger = logging.getLogger("Modeller")
+
+STATE_PATH = os.path.join(MODELS_DIR, "arima_refresh.json")
+
+
+class ModelRefresher:
+    """Actualiza el modelo ARIMA guardado con las observaciones nuevas sin reajustarlo desde cero.
+
+    Por defecto las observaciones nuevas se añaden con `model_artifact.append` (mismos parámetros,
+    solo se extiende el filtro de Kalman). El reajuste completo se hace cuando pasaron `refit_every`
+    días desde el último, cuando se detecta deriva (el RMSE de los errores a un paso de las
+    observaciones nuevas supera `drift_threshold` veces la desviación estándar del ruido del
+    modelo), cuando `append` no es posible o, con `append_refit`, en cada actualización.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, state_path=STATE_PATH, refit_every=30, drift_threshold=3.0,
+                 append_refit=False, data_dir=DATA_DIR):
+        self.model_path = model_path
+        self.data_dir = data_dir
+        self.state_path = state_path
+        self.refit_every = refit_every
+        self.drift_threshold = drift_threshold
+        self.append_refit = append_refit
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+
+    def full_refit(self, series, order, start_params=None, seasonal_order=(0, 0, 0, 0), trend=None):
+        """Ajusta el modelo sobre la serie completa (`modeller.fit` la lleva a frecuencia diaria)."""
+        return modeller.fit(series, order, start_params, seasonal_order=seasonal_order, trend=trend)
+
+    def metadata(self, results, series):
+        """Metadatos que guarda `modeller.main`: versión de los datos y métricas sobre la serie completa."""
+        from enriched_store import data_version
+
+        # Un modelo extendido desde el artefacto solo tiene la cola: se filtra la serie completa con sus parámetros
+        daily = modeller.daily(series)
+        if results.nobs < len(daily):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                results = results.model.clone(daily).filter(np.asarray(results.params))
+        metrics = modeller.evaluate(results, series)
+        return {
+            "data_version": data_version(self.data_dir),
+            "metrics": {key: metrics[key] for key in ("rmse", "mean", "rmse_mean_ratio")},
+        }
+
+    def drift_score(self, results, extended, n_new):
+        """RMSE de los errores a un paso de las observaciones nuevas relativo a la desviación del ruido."""
+        errors = np.asarray(extended.resid)[-n_new:]
+        sigma = np.sqrt(np.asarray(results.params)[-1])  # sigma2 es el último parámetro de ARIMA
+        return float(np.sqrt(np.nanmean(errors ** 2)) / sigma)
+
+    def refresh(self, series, force_refit=False, order=DEFAULT_ORDER, seasonal_order=(0, 0, 0, 0), trend=None):
+        """Actualiza el modelo con las observaciones de `series` posteriores a las del modelo guardado.
+
+        La especificación (`order`, `seasonal_order`, `trend`) se toma del modelo guardado, así que un
+        SARIMA promovido por `model_registry.py --save` se sigue reajustando como SARIMA; los
+        argumentos solo se usan cuando todavía no hay modelo.
+        """
+        state = self.load_state()
+        results = modeller.load(self.model_path) if os.path.exists(self.model_path) else None
+
+        if results is None:
+            reason, new = "sin modelo guardado", series
+        else:
+            order = tuple(results.model.order)
+            seasonal_order = tuple(results.model.seasonal_order)
+            trend = results.model.trend
+            last_date = pd.Timestamp(results.model.data.row_labels[-1])
+            new = series[series.index > last_date]
+            if new.empty:
+                print(f"ℹ El modelo ya incluye la última observación ({last_date.date()}).")
+                return results
+            # append espera un índice diario que continúe el del modelo (los huecos quedan como NaN)
+            new = new.reindex(pd.date_range(last_date + pd.Timedelta(days=1), new.index[-1], freq="D"))
+
+            last_refit = pd.Timestamp(state["last_full_refit"]) if state.get("last_full_refit") else None
+            reason = None
+            if force_refit:
+                reason = "forzado"
+            elif last_refit is None or (new.index[-1] - last_refit).days >= self.refit_every:
+                reason = f"programado (cada {self.refit_every} días)"
+            elif self.append_refit:
+                # Reestimar con append usaría solo la cola del artefacto: se reajusta sobre la serie completa
+                reason = "reestimación de parámetros"
+
+        mode = "append"
+        start = time.perf_counter()
+        if reason is None:
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    extended = model_artifact.append(results, new)
+                score = self.drift_score(results, extended, len(new))
+                if score > self.drift_threshold:
+                    reason = f"deriva ({score:.2f} > {self.drift_threshold})"
+                else:
+                    results = extended
+            except ValueError as e:
+                reason = f"append no disponible ({e})"
+
+        if reason is not None:
+            mode = "full"
+            start = time.perf_counter()
+            # Los parámetros anteriores solo sirven de punto de partida si la especificación es la misma
+            same_spec = (state.get("order") == list(order) and state.get("seasonal_order") == list(seasonal_order)
+                         and state.get("trend") == trend)
+            results = self.full_refit(series, order, start_params=state.get("params") if same_spec else None,
+                                      seasonal_order=seasonal_order, trend=trend)
+        fit_time = time.perf_counter() - start
+
+        modeller.save(results, self.model_path, metadata=self.metadata(results, series))
+        self.save_state({
+            "order": list(order),
+            "seasonal_order": list(results.model.seasonal_order),
+            "trend": results.model.trend,
+            "params": [float(p) for p in results.params],
+            "last_date": str(pd.Timestamp(series.index[-1]).date()),
+            "last_full_refit": str(pd.Timestamp(series.index[-1]).date()) if mode == "full" else state.get("last_full_refit"),
+            "last_mode": mode,
+            "last_fit_time": fit_time,
+            "new_observations": len(new),
+        })
+
+        label = f"ARIMA{order}" if not any(results.model.seasonal_order) else f"SARIMA{order}{tuple(results.model.seasonal_order)}"
+        message = (f"✅ {label} actualizado con {len(new)} observaciones nuevas: "
+                   f"{'reajuste completo, ' + reason if mode == 'full' else 'append'} en {fit_time:.3f}s")
+        logger.info(message)
+        print(message)
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualización incremental del modelo ARIMA guardado")
+    parser.add_argument("--refit-every", type=int, default=30, help="Días entre reajustes completos programados")
+    parser.add_argument("--drift-threshold", type=float, default=3.0,
+                        help="RMSE a un paso de los datos nuevos / desviación del ruido que fuerza un reajuste")
+    parser.add_argument("--append-refit", action="store_true", help="Reestima los parámetros en cada actualización (reajuste completo)")
+    parser.add_argument("--force-refit", action="store_true", help="Reajusta el modelo completo")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--state-path", default=STATE_PATH)
+    args = parser.parse_args()
+
+    refresher = ModelRefresher(model_path=args.model_path, state_path=args.state_path, refit_every=args.refit_every,
+                               drift_threshold=args.drift_threshold, append_refit=args.append_refit,
+                               data_dir=args.data_dir)
+    refresher.refresh(modeller.load_series(args.data_dir), force_refit=args.force_refit)
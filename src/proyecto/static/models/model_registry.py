@@ -0,0 +1,197 @@
+import argparse
+import json
+import math
+import os
+import signal
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import modeller
+from arima_search import FitTimeout, _raise_timeout
+from modeller import DATA_DIR, DEFAULT_ORDER, MODEL_PATH, MODELS_DIR
+
+LEADERBOARD_PATH = os.path.join(MODELS_DIR, "model_leaderboard.csv")
+REGISTRY_PATH = os.path.join(MODELS_DIR, "model_registry.json")
+# Un RMSE entre el 5% y 10% de la media se considera aceptable (modeller.py): se exige el extremo más estricto
+DEFAULT_THRESHOLD = 0.05
+SEASONAL_ORDER = (1, 0, 1, 7)
+
+
+# --- Modelos: cada uno recibe la serie completa y el tamaño del entrenamiento y devuelve las
+# predicciones a un paso sobre el holdout (con lo estimado en el entrenamiento) y sus datos ---
+
+def _naive(values, n_train):
+    return values[n_train - 1:-1], {}
+
+
+def _drift(values, n_train):
+    slope = (values[n_train - 1] - values[0]) / (n_train - 1)
+    return values[n_train - 1:-1] + slope, {"slope": float(slope)}
+
+
+def _arima(values, n_train, order=DEFAULT_ORDER, seasonal_order=(0, 0, 0, 0)):
+    result = modeller.fit(values[:n_train], order, seasonal_order=seasonal_order)
+    return result.apply(values).predict(start=n_train), {"aic": float(result.aic)}
+
+
+def _sarima(values, n_train):
+    return _arima(values, n_train, seasonal_order=SEASONAL_ORDER)
+
+
+def _ets(values, n_train):
+    from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+
+    spec = {"error": "add", "trend": "add", "damped_trend": True}
+    result = ETSModel(values[:n_train], **spec).fit(disp=False)
+    smoothed = ETSModel(values, **spec).smooth(result.params)
+    return np.asarray(smoothed.fittedvalues)[n_train:], {"aic": float(result.aic)}
+
+
+# `complexity` es el número de parámetros estimados: aproxima el costo de ajustar y mantener el modelo.
+# `order`/`seasonal_order` indican que el modelo se puede reajustar y guardar con `modeller`, y por lo
+# tanto servir con `ForecastService`; los demás (ingenuo, deriva, ETS) quedan como referencias.
+MODELS = {
+    "naive": {"label": "Ingenuo (último valor)", "run": _naive, "complexity": 0},
+    "drift": {"label": "Deriva", "run": _drift, "complexity": 1},
+    "ets": {"label": "ETS(A,Ad,N)", "run": _ets, "complexity": 5},
+    "arima": {"label": f"ARIMA{DEFAULT_ORDER}", "run": _arima, "complexity": sum(DEFAULT_ORDER) + 1,
+              "order": DEFAULT_ORDER, "seasonal_order": (0, 0, 0, 0)},
+    "sarima": {"label": f"SARIMA{DEFAULT_ORDER}{SEASONAL_ORDER}", "run": _sarima,
+               "complexity": sum(DEFAULT_ORDER) + 1 + SEASONAL_ORDER[0] + SEASONAL_ORDER[2],
+               "order": DEFAULT_ORDER, "seasonal_order": SEASONAL_ORDER},
+}
+
+
+def evaluate_model(name, values, holdout, timeout=None):
+    """Ajusta el modelo `name` sin las últimas `holdout` observaciones y mide sus predicciones a un paso.
+
+    La métrica es la de `modeller.evaluate` (RMSE / media del cierre de toda la serie), con el RMSE
+    calculado sobre el holdout para que todos los modelos se comparen con los mismos datos no vistos.
+    """
+    use_alarm = bool(timeout) and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    spec = MODELS[name]
+    row = {"model": name, "label": spec["label"], "complexity": spec["complexity"], "servable": "order" in spec,
+           "rmse": math.nan, "mean": math.nan, "rmse_mean_ratio": math.nan, "aic": math.nan}
+    start = time.perf_counter()
+    try:
+        n_train = len(values) - holdout
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            predictions, info = spec["run"](values, n_train)
+        actual = values[n_train:]
+        row["rmse"] = float(np.sqrt(np.mean((actual - np.asarray(predictions)) ** 2)))
+        row["mean"] = float(np.mean(values))
+        row["rmse_mean_ratio"] = row["rmse"] / row["mean"]
+        row["aic"] = info.get("aic", math.nan)
+        row["status"] = "ok"
+    except FitTimeout:
+        row["status"] = "timeout"
+    except Exception as e:
+        row["status"] = f"error: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    row["fit_time"] = time.perf_counter() - start
+    return row
+
+
+def compare(series, models=None, holdout=60, timeout=120, max_workers=None):
+    """Evalúa los modelos en paralelo (un proceso por modelo) y devuelve la tabla ordenada por error."""
+    models = list(models or MODELS)
+    unknown = [name for name in models if name not in MODELS]
+    if unknown:
+        raise ValueError(f"Modelos desconocidos: {unknown}. Opciones: {list(MODELS)}")
+
+    values = np.asarray(series, dtype=float)
+    if len(values) <= holdout + 2:
+        raise ValueError(f"La serie ({len(values)} datos) es muy corta para un holdout de {holdout}")
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=max_workers or min(len(models), os.cpu_count() or 1)) as executor:
+        futures = [executor.submit(evaluate_model, name, values, holdout, timeout) for name in models]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            print(f"ℹ {row['label']}: {row['status']}, RMSE/media={row['rmse_mean_ratio']:.4f} ({row['fit_time']:.2f}s)")
+
+    leaderboard = pd.DataFrame(rows, columns=["model", "label", "complexity", "servable", "rmse", "mean", "rmse_mean_ratio",
+                                              "aic", "status", "fit_time"])
+    leaderboard = leaderboard.sort_values("rmse_mean_ratio", na_position="last", kind="stable", ignore_index=True)
+    leaderboard.insert(0, "rank", range(1, len(leaderboard) + 1))
+    return leaderboard
+
+
+def promote(leaderboard, threshold=DEFAULT_THRESHOLD):
+    """Fila del modelo más barato (menos parámetros y, a igualdad, menor tiempo) con RMSE/media <= `threshold`, o None.
+
+    Solo se promueven modelos que se pueden guardar y servir (`servable`); las referencias ingenuas
+    y ETS se comparan pero no se promueven.
+    """
+    passing = leaderboard[leaderboard["servable"].astype(bool) & (leaderboard["status"] == "ok")
+                          & (leaderboard["rmse_mean_ratio"] <= threshold)]
+    if passing.empty:
+        return None
+    return passing.sort_values(["complexity", "fit_time"], kind="stable").iloc[0]
+
+
+def save_registry(leaderboard, promoted, threshold, holdout, path=REGISTRY_PATH):
+    """Guarda el modelo promovido y la comparación completa (JSON escrito de forma atómica)."""
+    registry = {
+        "promoted": None if promoted is None else promoted["model"],
+        "threshold": threshold,
+        "holdout": holdout,
+        "evaluated_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "models": json.loads(leaderboard.to_json(orient="records")),
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return registry
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara en paralelo ARIMA, SARIMA, ETS y referencias ingenuas y promueve "
+                                                 "el ARIMA/SARIMA más barato que cumple")
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--holdout", type=int, default=60, help="Últimas observaciones usadas para evaluar")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="RMSE / media máximo aceptado")
+    parser.add_argument("--timeout", type=float, default=120, help="Segundos máximos por modelo")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool (por defecto, uno por modelo)")
+    parser.add_argument("--save", action="store_true", help="Reajusta el modelo promovido sobre toda la serie y lo guarda")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--output", default=LEADERBOARD_PATH, help="CSV con la comparación")
+    parser.add_argument("--registry-path", default=REGISTRY_PATH)
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    series = modeller.load_series(args.data_dir)
+    print(f"✅ {len(series)} registros cargados desde la base de datos.")
+
+    start = time.perf_counter()
+    leaderboard = compare(series, args.models, holdout=args.holdout, timeout=args.timeout, max_workers=args.workers)
+    elapsed = time.perf_counter() - start
+    leaderboard.to_csv(args.output, index=False)
+    promoted = promote(leaderboard, args.threshold)
+    save_registry(leaderboard, promoted, args.threshold, args.holdout, args.registry_path)
+
+    print(f"✅ {len(leaderboard)} modelos evaluados en {elapsed:.1f}s "
+          f"(suma de ajustes: {leaderboard['fit_time'].sum():.1f}s)")
+    print(leaderboard[["rank", "label", "complexity", "servable", "rmse_mean_ratio", "status", "fit_time"]].to_string(index=False))
+    if promoted is None:
+        print(f"⚠ Ningún modelo servible (ARIMA/SARIMA) cumple RMSE/media <= {args.threshold}. Se mantiene el modelo guardado.")
+    else:
+        print(f"✅ Modelo promovido: {promoted['label']} (RMSE/media={promoted['rmse_mean_ratio']:.4f})")
+        if args.save:
+            spec = MODELS[promoted["model"]]
+            model_fit = modeller.fit(series, spec["order"], seasonal_order=spec["seasonal_order"])
+            modeller.save(model_fit, args.model_path, metadata={"registry_model": promoted["model"]})
+    print(f"✅ Comparación guardada en: {args.output} y {args.registry_path}")
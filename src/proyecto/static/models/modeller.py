@@ -15,166 +15,239 @@ Asignatura: Proyecto integrado V - Línea de énfasis<br>
 Docente: Andrés Felipe Callejas<br>
 Fecha: 25-mayo-2025
 
-Importación de librerías
+Uso como módulo: `load_series`, `fit`, `forecast`, `evaluate`, `save` y `load`.
+El modelo se guarda como artefacto JSON compacto (`model_artifact.py`); los `.pkl` de joblib se siguen leyendo.
+Uso desde la terminal: `python modeller.py [--order P D Q] [--plot | --plot-dir DIR]`.
+pandas, statsmodels, matplotlib y seaborn se importan solo cuando se usan, así que importar
+el módulo (por ejemplo desde el dashboard) no carga ninguna de esas librerías.
 """
 
-import pandas as pd
-import sqlite3
-import os
+import argparse
 import logging
-import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
-from statsmodels.graphics.tsaplots import plot_acf
-from statsmodels.tsa.arima.model import ARIMA
-from sklearn.metrics import mean_squared_error
-
-"""Descarga de los datos de GitHub y carga para el modelo"""
-
-# Directorio de Google Colab
-# data_dir = "/content"
-
-# Descargamos la base de datos desde GitHub
-# enriched_db_path = os.path.join(data_dir, "enriched_historical.db") # Esta línea fue modificada
-# if not os.path.exists(enriched_db_path):
-#     print("🔄 Descargando la base de datos desde GitHub")
-#     os.system(f"wget -O {enriched_db_path} https://raw.githubusercontent.com/jimymora25/Tarea_2_Proyecto_Integrado_V/main/src/proyecto/static/data/enriched_historical.db")
-
-script_dir = os.path.dirname(os.path.abspath(__file__))
-data_dir_abs = os.path.abspath(os.path.join(script_dir, '..', 'data'))
-enriched_db_path = os.path.join(data_dir_abs, "enriched_historical.db")
-
-if not os.path.exists(enriched_db_path):
-    print(f"❌ ERROR: El archivo '{enriched_db_path}' no se encontró.")
-    raise FileNotFoundError(f"Archivo de base de datos no encontrado: {enriched_db_path}")
-
-
-# Nos conectamos a la base de datos y cargamos los datos
-conn = sqlite3.connect(enriched_db_path)
-query = "SELECT year, month, day, close FROM enriched_historical"
-df = pd.read_sql_query(query, conn)
-conn.close()
-
-# Convertimos la fecha a formato de fecha y la establecemos como índice
-df["date"] = pd.to_datetime(df[['year', 'month', 'day']])
-df.set_index("date", inplace=True)
-
-# Recorremos e imprimimos la cantidad de registros en la base de datos
-print(f"✅ {len(df)} registros cargados desde la base de datos.")
-
-"""Exploración de datos"""
-
-# Mostramos las primeras filas del DataFrame
-print("Vista previa de los datos ETH:")
-print(df.head())
-
-# Resumen estadístico
-print("\nResumen estadístico:")
-print(df.describe())
-
-"""Visualización de los datos"""
-
-# Estilo de los gráficos
-sns.set_style("whitegrid")
-
-# Gráfico de la serie de tiempo
-plt.figure(figsize=(12, 6))
-plt.plot(df.index, df["close"], label="Precio de cierre", color="blue")
-plt.xlabel("Fecha")
-plt.ylabel("Precio de cierre")
-plt.title("Evolución del precio de cierre")
-plt.legend()
-plt.show()
-
-# En este gráfico, podemos analizar los datos desde el año 2020 hasta la fecha, donde encontramos los siguentes puntos claves en la evolución del precio:
-# 2020 - 2021: El precio de cierre comienza cerca de los 200 - 300 USD y aumenta de manera gradual
-# 2021: Se evidencia un pico notable superando los 4000 a mediados del año y a finales del mismo, lega casi a los 5000 USD
-# 2022 - 2023: A mediados de 2022 y principios de 2023 el precio cae y se estabiliza en un rango más bajo, entre 1000 y 2000 USD
-# 2023 - 2024: A mediados de 2023 y principios de 2024 el precio se estabiliza ligramente, manteniéndose debajo de 2500 USD
-# 2024: El precio se eleva fuertemente a inicios del año, alcanzando neuvamente los 4000 USD
-# 2024 - 2025: El precio tiende a la baja, fluctuando alrededor de los 2500 y 2700 USD
-
-# Histograma de precios de cierre
-plt.figure(figsize=(8, 6))
-sns.histplot(df["close"], bins=30, kde=True, color="green")
-plt.xlabel("Precio de cierre")
-plt.ylabel("Frecuencia")
-plt.title("Distribución de los precios de cierre")
-plt.show()
-
-# El gráfico muestra la distribución de los precios de cierre, donde la mayoría se agrupan entre 1700 y 1800 USD, donde se evidencia el pico más alto de la frecuencia
-# La distribución muestra que es más probable encontrar precios en el rango bajo (< 1000) y en el rango medio (alrededor de 1500-2000 USD)
-# Cuando el precio aumenta, la frecuencia disminuye; por lo cual es menos común encontrar precios muy altos (cercanos a 5000 USD)
-
-# Gráfico de autocorrelación
-plt.figure(figsize=(8, 8))
-plot_acf(df["close"], lags=30)
-plt.title("Autocorrelación de la serie de tiempo")
-plt.xlabel("Rezagos")
-plt.ylabel("Autocorrelación")
-plt.show()
-
-# Los rezagos van a 0 a 30
-# Las barras del gráfico indica el coeficiente de autocorrelación para un rezago en específico
-# El intérvalo de confianza (área azul sombreada), indicando que si las barras salen del área, significa que la autocorrelación en ese rezago es estadísticamente significativa
-# Todas las barras por encima del intérvalo de confianza tienen una autocorrelación positivas y fuerte, lo que indica una influencia en los valores futuros
-
-"""Entrenamiento del modelo ARIMA"""
-
-# Preparamos los datos para ARIMA
-ts_data = df["close"].astype(float)
-
-# Entrenamos el modelo ARIMA
-model = ARIMA(ts_data, order=(3, 1, 2))
-model_fit = model.fit()
-
-print("✅ Modelo ARIMA entrenado exitosamente.")
-
-"""Evaluación del error del modelo"""
-
-# Calculamos la media del precio de cierre
-media_close = df["close"].mean()
-
-# Realizamos las predicciones con el modelo entrenado
-y_pred = model_fit.predict(start=0, end=len(df)-1)
-
-# Calculamoss el RMSE
-rmse = mean_squared_error(df["close"], y_pred) ** 0.5
+import os
+import time
+import warnings
 
-# Calculamos la proporción RMSE / Media
-relacion_rmse_media = rmse / media_close
+logger = logging.getLogger("Modeller")
 
-print(f"🔍 RMSE del modelo ARIMA: {rmse:.2f}")
-print(f"📊 Media del precio de cierre: {media_close:.2f}")
-print(f"📏 Relación RMSE / Media: {relacion_rmse_media:.4f}")
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.abspath(os.path.join(MODELS_DIR, "..", "data"))
+MODEL_PATH = os.path.join(MODELS_DIR, "arima_model.json")
+DEFAULT_ORDER = (3, 1, 2)
 
-# El resultado nos indica que en promedio, el modelo tiene un error del 5.25% con respecto al precio de cierre medio.
-# Un RMSE entre el 5% y 10% de la media, se considera aceptable para modelos de predicción
 
-#Evaluación precciones vs datos reales
-plt.figure(figsize=(12, 6))
-plt.plot(df.index[-50:], df["close"].tail(50), label="Real", color="blue")   # Últimos 50 datos reales
-plt.plot(df.index[-50:], y_pred[-50:], label="Predicción", color="red", linestyle="dashed")   # Últimos 50 valores predichos
-plt.legend()
-plt.title("Comparación de datos reales vs. predicción")
-plt.show()
+# --- Carga de los datos para el modelo ---
 
-# Se evidencia que el modelo se acerca a la tendencia general de los datos reales
-# Hay momentos donde el comportamiento es similar, pero se perciben desviaciones o desfase
+def load_series(data_dir=DATA_DIR):
+    """Serie de precios de cierre indexada por fecha en orden cronológico."""
+    import pandas as pd
+    from enriched_store import load_enriched
 
-"""Guardado del modelo"""
+    enriched_db_path = os.path.join(data_dir, "enriched_historical.db")
+    if not os.path.exists(enriched_db_path) and not os.path.exists(os.path.join(data_dir, "enriched_historical.parquet")):
+        print(f"❌ ERROR: El archivo '{enriched_db_path}' no se encontró.")
+        raise FileNotFoundError(f"Archivo de base de datos no encontrado: {enriched_db_path}")
 
-# Directorio donde se guardará el modelo
-# models_dir = "/content/models" 
-# os.makedirs(models_dir, exist_ok=True) 
+    # Cargamos solo las columnas necesarias (desde Parquet si está disponible, si no desde SQLite)
+    df = load_enriched(data_dir, columns=["year", "month", "day", "close"])
+    dates = pd.to_datetime(df[["year", "month", "day"]])
+    return pd.Series(df["close"].astype(float).to_numpy(), index=dates, name="close").sort_index()
 
-script_dir = os.path.dirname(os.path.abspath(__file__))
-models_dir_path = script_dir
 
-os.makedirs(models_dir_path, exist_ok=True)
+# --- Entrenamiento del modelo ARIMA ---
+
+def daily(series):
+    """Lleva una serie con índice de fechas a frecuencia diaria (los días faltantes quedan como NaN)."""
+    if hasattr(series, "asfreq") and series.index.inferred_type == "datetime64":
+        return series.asfreq("D")
+    return series
 
-# Guardar el modelo
-model_path = os.path.join(models_dir_path, "arima_model.pkl")
-joblib.dump(model_fit, model_path)
 
-print(f"✅ Modelo ARIMA guardado en: {model_path}")
\ No newline at end of file
+def fit(series, order=DEFAULT_ORDER, start_params=None, seasonal_order=(0, 0, 0, 0), trend=None):
+    """Ajusta ARIMA(`order`)(`seasonal_order`) sobre `series`; con `start_params` el optimizador arranca desde esos parámetros.
+
+    `trend` es la tendencia determinística de statsmodels (por defecto la de ARIMA según `order`).
+
+    Una serie con índice de fechas se lleva a frecuencia diaria (los días faltantes quedan como NaN,
+    que el filtro de Kalman omite) para que el modelo pueda pronosticar y extenderse con `append`.
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    series = daily(series)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return ARIMA(series, order=order, seasonal_order=seasonal_order, trend=trend).fit(start_params=start_params)
+
+
+def forecast(model_fit, steps=30, alpha=0.05):
+    """Pronóstico de `steps` periodos con su intervalo de confianza al (1 - alpha)."""
+    import pandas as pd
+
+    prediction = model_fit.get_forecast(steps)
+    interval = prediction.conf_int(alpha=alpha)
+    return pd.DataFrame({
+        "forecast": prediction.predicted_mean,
+        "lower": interval.iloc[:, 0],
+        "upper": interval.iloc[:, 1],
+    })
+
+
+# --- Evaluación del error del modelo ---
+
+def evaluate(model_fit, series):
+    """RMSE dentro de la muestra, media del cierre y su relación (la métrica original del notebook)."""
+    import numpy as np
+
+    # Realizamos las predicciones con el modelo entrenado (alineadas por fecha: el modelo puede
+    # incluir como NaN días que faltan en la serie)
+    y_pred = model_fit.predict(start=0, end=model_fit.nobs - 1)
+    if hasattr(series, "index") and hasattr(y_pred, "reindex"):
+        y_pred = y_pred.reindex(series.index)
+    rmse = float(np.sqrt(np.mean((np.asarray(series) - np.asarray(y_pred)) ** 2)))
+    media_close = float(np.mean(series))
+    # Un RMSE entre el 5% y 10% de la media, se considera aceptable para modelos de predicción
+    return {"rmse": rmse, "mean": media_close, "rmse_mean_ratio": rmse / media_close, "y_pred": y_pred}
+
+
+# --- Guardado del modelo ---
+
+def save(model_fit, model_path=MODEL_PATH, metadata=None):
+    """Guarda el modelo como artefacto JSON (orden, parámetros, estado y metadatos) o, si la ruta termina en .pkl, con joblib."""
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    if model_path.endswith(".pkl"):
+        import joblib
+        joblib.dump(model_fit, model_path)
+    else:
+        from model_artifact import save_artifact
+        save_artifact(model_fit, model_path, metadata)
+    print(f"✅ Modelo ARIMA guardado en: {model_path}")
+
+
+def load(model_path=MODEL_PATH):
+    """Carga un modelo capaz de pronosticar desde un artefacto JSON o un .pkl de joblib."""
+    if model_path.endswith(".pkl"):
+        import joblib
+        return joblib.load(model_path)
+    from model_artifact import load_artifact
+    return load_artifact(model_path)
+
+
+# --- Visualización de los datos (opcional) ---
+
+def plot_exploration(series, y_pred, plot_dir=None):
+    """Gráficos del notebook; con `plot_dir` se guardan como PNG sin abrir ventanas."""
+    import matplotlib
+    if plot_dir:
+        matplotlib.use("Agg")
+        os.makedirs(plot_dir, exist_ok=True)
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from statsmodels.graphics.tsaplots import plot_acf
+
+    def show(name):
+        if plot_dir:
+            plt.savefig(os.path.join(plot_dir, f"{name}.png"), bbox_inches="tight")
+            plt.close()
+        else:
+            plt.show()
+
+    # Estilo de los gráficos
+    sns.set_style("whitegrid")
+
+    # Gráfico de la serie de tiempo
+    plt.figure(figsize=(12, 6))
+    plt.plot(series.index, series, label="Precio de cierre", color="blue")
+    plt.xlabel("Fecha")
+    plt.ylabel("Precio de cierre")
+    plt.title("Evolución del precio de cierre")
+    plt.legend()
+    show("serie_cierre")
+
+    # En este gráfico, podemos analizar los datos desde el año 2020 hasta la fecha, donde encontramos los siguentes puntos claves en la evolución del precio:
+    # 2020 - 2021: El precio de cierre comienza cerca de los 200 - 300 USD y aumenta de manera gradual
+    # 2021: Se evidencia un pico notable superando los 4000 a mediados del año y a finales del mismo, lega casi a los 5000 USD
+    # 2022 - 2023: A mediados de 2022 y principios de 2023 el precio cae y se estabiliza en un rango más bajo, entre 1000 y 2000 USD
+    # 2023 - 2024: A mediados de 2023 y principios de 2024 el precio se estabiliza ligramente, manteniéndose debajo de 2500 USD
+    # 2024: El precio se eleva fuertemente a inicios del año, alcanzando neuvamente los 4000 USD
+    # 2024 - 2025: El precio tiende a la baja, fluctuando alrededor de los 2500 y 2700 USD
+
+    # Histograma de precios de cierre
+    plt.figure(figsize=(8, 6))
+    sns.histplot(series, bins=30, kde=True, color="green")
+    plt.xlabel("Precio de cierre")
+    plt.ylabel("Frecuencia")
+    plt.title("Distribución de los precios de cierre")
+    show("histograma_cierre")
+
+    # El gráfico muestra la distribución de los precios de cierre, donde la mayoría se agrupan entre 1700 y 1800 USD, donde se evidencia el pico más alto de la frecuencia
+    # La distribución muestra que es más probable encontrar precios en el rango bajo (< 1000) y en el rango medio (alrededor de 1500-2000 USD)
+    # Cuando el precio aumenta, la frecuencia disminuye; por lo cual es menos común encontrar precios muy altos (cercanos a 5000 USD)
+
+    # Gráfico de autocorrelación
+    plot_acf(series, lags=30)
+    plt.title("Autocorrelación de la serie de tiempo")
+    plt.xlabel("Rezagos")
+    plt.ylabel("Autocorrelación")
+    show("autocorrelacion")
+
+    # Los rezagos van a 0 a 30
+    # Las barras del gráfico indica el coeficiente de autocorrelación para un rezago en específico
+    # El intérvalo de confianza (área azul sombreada), indicando que si las barras salen del área, significa que la autocorrelación en ese rezago es estadísticamente significativa
+    # Todas las barras por encima del intérvalo de confianza tienen una autocorrelación positivas y fuerte, lo que indica una influencia en los valores futuros
+
+    #Evaluación precciones vs datos reales
+    plt.figure(figsize=(12, 6))
+    plt.plot(series.index[-50:], series.tail(50), label="Real", color="blue")   # Últimos 50 datos reales
+    plt.plot(series.index[-50:], y_pred[-50:], label="Predicción", color="red", linestyle="dashed")   # Últimos 50 valores predichos
+    plt.legend()
+    plt.title("Comparación de datos reales vs. predicción")
+    show("real_vs_prediccion")
+
+    # Se evidencia que el modelo se acerca a la tendencia general de los datos reales
+    # Hay momentos donde el comportamiento es similar, pero se perciben desviaciones o desfase
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entrenamiento y evaluación del modelo ARIMA del precio de cierre de ETH")
+    parser.add_argument("--order", type=int, nargs=3, default=list(DEFAULT_ORDER), metavar=("P", "D", "Q"))
+    parser.add_argument("--steps", type=int, default=0, help="Días a pronosticar al final (0 = ninguno)")
+    parser.add_argument("--plot", action="store_true", help="Muestra los gráficos del análisis exploratorio")
+    parser.add_argument("--plot-dir", default=None, help="Guarda los gráficos como PNG en este directorio (sin ventanas)")
+    parser.add_argument("--no-save", action="store_true", help="No guarda el modelo entrenado")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    series = load_series(args.data_dir)
+    print(f"✅ {len(series)} registros cargados desde la base de datos.")
+
+    # Exploración de datos
+    print("Vista previa de los datos ETH:")
+    print(series.head())
+    print("\nResumen estadístico:")
+    print(series.describe())
+
+    start = time.perf_counter()
+    model_fit = fit(series, tuple(args.order))
+    print(f"✅ Modelo ARIMA{tuple(args.order)} entrenado exitosamente en {time.perf_counter() - start:.2f}s.")
+
+    metrics = evaluate(model_fit, series)
+    print(f"🔍 RMSE del modelo ARIMA: {metrics['rmse']:.2f}")
+    print(f"📊 Media del precio de cierre: {metrics['mean']:.2f}")
+    print(f"📏 Relación RMSE / Media: {metrics['rmse_mean_ratio']:.4f}")
+
+    if args.steps:
+        print(forecast(model_fit, args.steps).to_string())
+    if args.plot or args.plot_dir:
+        plot_exploration(series, metrics["y_pred"], args.plot_dir)
+    if not args.no_save:
+        from enriched_store import data_version
+        save(model_fit, args.model_path, metadata={
+            "data_version": data_version(args.data_dir),
+            "metrics": {key: metrics[key] for key in ("rmse", "mean", "rmse_mean_ratio")},
+        })
+    return model_fit
+
+
+if __name__ == "__main__":
+    main()
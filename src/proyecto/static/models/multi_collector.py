@@ -0,0 +1,193 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from collector import DataCollector
+from table_parser import COLUMNS
+
+YAHOO_URL_TEMPLATE = "https://finance.yahoo.com/quote/{symbol}/history"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """Limita la frecuencia de peticiones por host (intervalo mínimo entre peticiones)."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_allowed = {}
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed.get(host, now))
+            self._next_allowed[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class MultiTickerCollector:
+    """Recolecta el histórico de varios símbolos en paralelo y lo guarda por (symbol, date)."""
+
+    def __init__(self, symbols, url_template=YAHOO_URL_TEMPLATE, db_path=None, max_workers=8,
+                 min_interval=0.5, max_retries=3, backoff=1.0, timeout=30, overlap_days=7, parser='auto'):
+        self.symbols = list(symbols)
+        self.url_template = url_template
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        # Sesión compartida con un pool de conexiones del tamaño del pool de hilos
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.rate_limiter = HostRateLimiter(min_interval)
+
+        # DataCollector aporta el parser, la construcción de URL y la ventana delta
+        self.collector = DataCollector(url_base=url_template, overlap_days=overlap_days, parser=parser,
+                                       session=self.session, use_cache=False)
+        self.db_path = db_path or os.path.join(self.collector.data_dir, "multi_historical.db")
+        self.logger = self.collector.logger
+
+    def _create_table(self, conn):
+        """Asegura que la tabla `historical` con clave (symbol, date) exista."""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS historical (
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume INTEGER,
+                PRIMARY KEY (symbol, date)
+            )
+        ''')
+
+    def get_latest_dates(self):
+        """Devuelve la fecha más reciente almacenada para cada símbolo."""
+        if not os.path.exists(self.db_path):
+            return {}
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute("SELECT symbol, date FROM historical").fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        finally:
+            conn.close()
+
+        latest = {}
+        for symbol, date in rows:
+            parsed = self.collector.parse_date(date)
+            if parsed is not None and (symbol not in latest or parsed > latest[symbol]):
+                latest[symbol] = parsed
+        return latest
+
+    def _get(self, url):
+        """GET con límite de frecuencia por host y reintentos con backoff exponencial."""
+        headers = {"User-Agent": "Mozilla/5.0"}
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait(url)
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = str(e)
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    return response
+                error = f"código {response.status_code}"
+
+            if attempt < self.max_retries:
+                delay = self.backoff * (2 ** attempt)
+                self.logger.warning(f"⚠ Reintento {attempt + 1}/{self.max_retries} para {url} en {delay:.1f}s ({error})")
+                time.sleep(delay)
+
+        raise requests.RequestException(f"Se agotaron los reintentos para {url} ({error})")
+
+    def fetch_symbol(self, symbol, start_date=None):
+        """Descarga y extrae la tabla histórica de un símbolo."""
+        url_base = self.url_template.format(symbol=symbol)
+        url = self.collector.build_dynamic_url(start_date, url_base=url_base)
+        response = self._get(url)
+        if response.status_code != 200:
+            raise requests.RequestException(f"Error al obtener {symbol}, código: {response.status_code}")
+
+        data = self.collector.parse_html(response.text)
+        if data is None:
+            raise ValueError(f"No se encontró la tabla de {symbol}")
+        return data
+
+    def save_symbol(self, conn, symbol, data):
+        """Upsert de las filas de un símbolo en una sola transacción."""
+        rows = [(symbol,) + row for row in zip(*(data[column] for column in COLUMNS))]
+        with conn:
+            conn.executemany('''
+                INSERT INTO historical (symbol, date, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(symbol, date) DO UPDATE SET
+                    open = excluded.open,
+                    high = excluded.high,
+                    low = excluded.low,
+                    close = excluded.close,
+                    volume = excluded.volume
+            ''', rows)
+        return len(rows)
+
+    def collect(self, full_backfill=False):
+        """Descarga todos los símbolos en paralelo y guarda los resultados.
+
+        Devuelve un diccionario {symbol: filas guardadas} y la lista de símbolos fallidos.
+        """
+        latest = {} if full_backfill else self.get_latest_dates()
+        results, failed = {}, []
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self._create_table(conn)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {}
+                for symbol in self.symbols:
+                    start = self.collector.delta_start(latest[symbol]) if symbol in latest else None
+                    futures[executor.submit(self.fetch_symbol, symbol, start)] = symbol
+
+                # Las escrituras en SQLite se hacen desde el hilo principal a medida que llegan los datos
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        data = future.result()
+                    except (requests.RequestException, ValueError) as e:
+                        self.logger.error(f"⚠ {symbol}: {e}")
+                        failed.append(symbol)
+                        continue
+                    results[symbol] = self.save_symbol(conn, symbol, data)
+        finally:
+            conn.close()
+
+        self.logger.info(f"✅ {len(results)} símbolos guardados en {self.db_path}, {len(failed)} con error.")
+        print(f"✅ {len(results)} símbolos guardados, {len(failed)} con error: {failed}")
+        return results, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recolector concurrente de varios símbolos de Yahoo Finance")
+    parser.add_argument("symbols", nargs="+", help="Símbolos a descargar, por ejemplo ETH-USD BTC-USD")
+    parser.add_argument("--url-template", default=YAHOO_URL_TEMPLATE, help="Plantilla de URL con {symbol}")
+    parser.add_argument("--workers", type=int, default=8, help="Número de descargas simultáneas")
+    parser.add_argument("--min-interval", type=float, default=0.5, help="Segundos mínimos entre peticiones al mismo host")
+    parser.add_argument("--full", action="store_true", help="Descarga los 5 años completos de cada símbolo")
+    args = parser.parse_args()
+
+    collector = MultiTickerCollector(args.symbols, url_template=args.url_template, max_workers=args.workers,
+                                     min_interval=args.min_interval)
+    collector.collect(full_backfill=args.full)
@@ -0,0 +1,94 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# Medidas agregadas y estadísticas guardadas por bucket (columnas `<medida>_<estadística>`)
+MEASURES = ["open", "high", "low", "close", "volume"]
+STATS = ["sum", "count", "min", "max", "first", "last"]
+
+# Claves de cada tabla de rollups. Las granularidades que no son periodos (día de la semana) se
+# agrupan también por año para poder acotarlas a un rango de fechas.
+ROLLUP_KEYS = {
+    "year": ["year"],
+    "quarter": ["year", "quarter"],
+    "month": ["year", "month"],
+    "day_of_week": ["year", "day_of_week"],
+}
+
+# Periodo de calendario que cubre cada bucket
+ROLLUP_PERIODS = {"year": "Y", "quarter": "Q", "month": "M", "day_of_week": "Y"}
+
+
+def table_name(granularity):
+    return f"rollup_{granularity}"
+
+
+def build_rollups(df, granularity):
+    """Agrega los datos enriquecidos de `df` por los buckets de `granularity`.
+
+    Cada fila guarda suma, conteo, mínimo, máximo, primero y último de cada medida, además de
+    la primera y la última fecha del bucket (necesarias para combinar buckets).
+    """
+    keys = ROLLUP_KEYS[granularity]
+    grouped = df.sort_values("date", kind="stable").groupby(keys, sort=True)
+    rollup = grouped[MEASURES].agg(STATS)
+    rollup.columns = [f"{measure}_{stat}" for measure, stat in rollup.columns]
+    rollup["first_date"] = grouped["date"].min()
+    rollup["last_date"] = grouped["date"].max()
+    return rollup.reset_index()
+
+
+def combine(rollup, keys):
+    """Combina buckets en grupos más gruesos (`keys`), p. ej. (año, mes) -> mes del año."""
+    ordered = rollup.sort_values("first_date", kind="stable")
+    aggregations = {"first_date": "min", "last_date": "max"}
+    for measure in MEASURES:
+        aggregations.update({f"{measure}_sum": "sum", f"{measure}_count": "sum",
+                             f"{measure}_min": "min", f"{measure}_max": "max",
+                             f"{measure}_first": "first", f"{measure}_last": "last"})
+    return ordered.groupby(keys, sort=True).agg(aggregations).reset_index()
+
+
+def load_rollups(db_path, df=None):
+    """Lee las tablas de rollups de la BD enriquecida.
+
+    Si alguna tabla no existe (BD generada antes de los rollups) y se pasa `df`, se calcula en memoria.
+    """
+    rollups = {}
+    conn = sqlite3.connect(db_path)
+    try:
+        for granularity in ROLLUP_KEYS:
+            try:
+                rollup = pd.read_sql_query(f"SELECT * FROM {table_name(granularity)}", conn)
+            except (sqlite3.OperationalError, pd.errors.DatabaseError):
+                if df is None:
+                    continue
+                rollup = build_rollups(df, granularity)
+            rollup["first_date"] = pd.to_datetime(rollup["first_date"])
+            rollup["last_date"] = pd.to_datetime(rollup["last_date"])
+            rollups[granularity] = rollup
+    finally:
+        conn.close()
+    return rollups
+
+
+def rollup_range(rollup, granularity, data, start, end):
+    """Buckets de `granularity` para las fechas entre `start` y `end` (ambos días incluidos).
+
+    Los buckets completos dentro del rango salen de la tabla de rollups; solo las filas de los
+    buckets parciales de los bordes se agregan desde `data` (un `TimeIndexedFrame` enriquecido).
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    periods = pd.PeriodIndex(rollup["first_date"], freq=ROLLUP_PERIODS[granularity])
+    period_start = periods.start_time
+    period_end = periods.end_time.normalize()
+    inside = np.asarray((period_start >= start) & (period_end <= end))
+    if not inside.any():
+        return build_rollups(data.slice(start, end), granularity)
+
+    interior = rollup[inside]
+    edges = [data.slice(start, period_start[inside].min() - pd.Timedelta(days=1)),
+             data.slice(period_end[inside].max() + pd.Timedelta(days=1), end)]
+    parts = [interior] + [build_rollups(edge, granularity) for edge in edges if not edge.empty]
+    return combine(pd.concat(parts, ignore_index=True), ROLLUP_KEYS[granularity])
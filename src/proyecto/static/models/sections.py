@@ -0,0 +1,43 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+
+def render_sections(sections, lazy=True, key="active_section"):
+    """
+    Dibuja las secciones del dashboard (`{título: función}`) y devuelve el tiempo en segundos
+    de cada una que se haya ejecutado.
+
+    En modo diferido un selector horizontal elige la sección activa y solo esa se calcula;
+    si no, se usan pestañas de `st.tabs`, que ejecutan todas las secciones en cada rerun.
+    """
+    if lazy:
+        active = st.radio("Sección", list(sections), horizontal=True, key=key, label_visibility="collapsed")
+        targets = [(active, st.container())]
+    else:
+        targets = list(zip(sections, st.tabs(list(sections))))
+
+    timings = {}
+    for title, container in targets:
+        start = time.perf_counter()
+        with container:
+            sections[title]()
+        timings[title] = time.perf_counter() - start
+    return timings
+
+
+def show_timings(timings, container=st.sidebar, key="section_timings"):
+    """
+    Muestra el último tiempo medido de cada sección. Los tiempos se guardan en la sesión para que
+    en modo diferido se puedan comparar secciones visitadas en reruns distintos.
+    """
+    history = st.session_state.setdefault(key, {})
+    history.update(timings)
+    with container.expander("⏱ Tiempos por sección"):
+        breakdown = pd.DataFrame({
+            "Sección": list(history),
+            "Tiempo (ms)": [round(seconds * 1000, 1) for seconds in history.values()],
+            "Último rerun": [title in timings for title in history],
+        })
+        st.dataframe(breakdown.sort_values("Tiempo (ms)", ascending=False), hide_index=True)
@@ -0,0 +1,312 @@
+import argparse
+import json
+import math
+import os
+import sqlite3
+from collections import deque
+
+import pandas as pd
+
+# Tabla de la BD enriquecida con los KPIs por día que mantiene el motor en streaming (la lee el dashboard)
+KPI_TABLE = "kpi_daily"
+
+
+class RollingWindow:
+    """Media y varianza (ddof=1) de las últimas `size` observaciones con Welford en ventana deslizante.
+
+    Cada actualización es O(1): al llenarse la ventana el valor nuevo reemplaza al más antiguo
+    en la media y en la suma de cuadrados de las desviaciones (`m2`).
+    """
+
+    def __init__(self, size, values=(), mean=0.0, m2=0.0):
+        self.size = size
+        self.values = deque(values, maxlen=size)
+        self.mean = mean
+        self.m2 = m2
+
+    def push(self, x):
+        n = len(self.values)
+        if n < self.size:
+            delta = x - self.mean
+            self.mean += delta / (n + 1)
+            self.m2 += delta * (x - self.mean)
+        else:
+            old = self.values[0]
+            old_mean = self.mean
+            self.mean += (x - old) / n
+            self.m2 += (x - old) * (x - self.mean + old - old_mean)
+        self.values.append(x)
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def current_mean(self):
+        return self.mean if self.full else math.nan
+
+    def current_std(self):
+        if not self.full or self.size < 2:
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (self.size - 1))
+
+    def state(self):
+        return {"size": self.size, "values": list(self.values), "mean": self.mean, "m2": self.m2}
+
+
+class StreamingKPIs:
+    """Motor de KPIs que avanza una barra a la vez con estado en memoria y checkpoint en JSON.
+
+    Calcula las mismas columnas que `kpis.add_kpis` (Price Change %, Moving Average 30,
+    Volatility, Cumulative Return, Price Range) sin recorrer el histórico completo: la media y la
+    volatilidad usan ventanas deslizantes y el retorno acumulado un producto acumulado.
+
+    Las últimas `revision_window` barras se guardan junto con el estado anterior a ellas (`settled`),
+    así que si el enriquecedor revisa alguna (reprocesa sus últimos días) el motor retrocede hasta
+    la primera barra cambiada y vuelve a calcular desde ahí.
+    """
+
+    def __init__(self, mean_window=30, std_window=30, revision_window=7):
+        self.mean_window = RollingWindow(mean_window)
+        self.std_window = RollingWindow(std_window)
+        self.last_close = None
+        self.cumulative_return = 1.0
+        self.last_date = None
+        self.count = 0
+        self.revision_window = revision_window
+        self.recent = deque()  # (date, high, low, close) de las últimas `revision_window` barras
+        self.settled = StreamingKPIs(mean_window, std_window, 0) if revision_window else None
+
+    def update(self, date, high, low, close):
+        """Añade una barra (en orden cronológico) y devuelve sus KPIs."""
+        date = pd.Timestamp(date)
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"La barra {date} no es posterior a la última procesada ({self.last_date})")
+
+        price_change = math.nan if self.last_close is None else close / self.last_close - 1
+        self.cumulative_return *= 1 + (0.0 if math.isnan(price_change) else price_change)
+        self.mean_window.push(close)
+        self.std_window.push(close)
+        self.last_close = close
+        self.last_date = date
+        self.count += 1
+        if self.settled is not None:
+            # La barra que sale de la ventana de revisión ya no puede cambiar: pasa al estado `settled`
+            self.recent.append((date, high, low, close))
+            if len(self.recent) > self.revision_window:
+                self.settled.update(*self.recent.popleft())
+
+        return {
+            "date": date,
+            "Price Change %": price_change * 100,
+            "Moving Average 30": self.mean_window.current_mean(),
+            "Volatility": self.std_window.current_std(),
+            "Cumulative Return": self.cumulative_return,
+            "Price Range": high - low,
+        }
+
+    def revision_start(self, df):
+        """Fecha de la primera barra de la ventana de revisión que `df` trae distinta o nueva, o None."""
+        if not self.recent:
+            return None
+        dates = pd.to_datetime(df["date"])
+        window = df[(dates >= self.recent[0][0]) & (dates <= self.last_date)]
+        seen = {date: (high, low, close) for date, high, low, close in self.recent}
+        for date, high, low, close in zip(pd.to_datetime(window["date"]), window["high"], window["low"], window["close"]):
+            if seen.get(date) != (high, low, close):
+                return date
+        return None
+
+    def rewind(self, start):
+        """Vuelve al estado anterior a la barra `start` (que debe estar en la ventana de revisión)."""
+        kept = [bar for bar in self.recent if bar[0] < start]
+        settled = StreamingKPIs.from_state(self.settled.state())
+        self.mean_window, self.std_window = settled.mean_window, settled.std_window
+        self.last_close, self.cumulative_return = settled.last_close, settled.cumulative_return
+        self.last_date, self.count = settled.last_date, settled.count
+        self.recent.clear()
+        for bar in kept:
+            self.update(*bar)
+
+    def advance(self, df):
+        """Procesa las filas de `df` posteriores a la última barra del estado y devuelve sus KPIs.
+
+        Si `df` trae revisada alguna barra de la ventana de revisión, se recalculan (y se devuelven)
+        también las barras desde la primera cambiada.
+        """
+        df = df.sort_values("date", kind="stable")
+        if self.last_date is not None:
+            start = self.revision_start(df)
+            if start is not None:
+                self.rewind(start)
+            df = df[pd.to_datetime(df["date"]) > self.last_date]
+        rows = [self.update(date, high, low, close)
+                for date, high, low, close in zip(df["date"], df["high"], df["low"], df["close"])]
+        return pd.DataFrame(rows, columns=["date", "Price Change %", "Moving Average 30", "Volatility",
+                                           "Cumulative Return", "Price Range"])
+
+    def state(self):
+        return {
+            "mean_window": self.mean_window.state(),
+            "std_window": self.std_window.state(),
+            "last_close": self.last_close,
+            "cumulative_return": self.cumulative_return,
+            "last_date": None if self.last_date is None else self.last_date.isoformat(),
+            "count": self.count,
+            "revision_window": self.revision_window,
+            "recent": [[date.isoformat(), high, low, close] for date, high, low, close in self.recent],
+            "settled": None if self.settled is None else self.settled.state(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        # Los checkpoints anteriores a la ventana de revisión no la tienen: se cargan sin ella
+        engine = cls(revision_window=0)
+        engine.mean_window = RollingWindow(**state["mean_window"])
+        engine.std_window = RollingWindow(**state["std_window"])
+        engine.last_close = state["last_close"]
+        engine.cumulative_return = state["cumulative_return"]
+        engine.last_date = None if state["last_date"] is None else pd.Timestamp(state["last_date"])
+        engine.count = state["count"]
+        engine.revision_window = state.get("revision_window", 0)
+        engine.recent = deque((pd.Timestamp(date), high, low, close) for date, high, low, close in state.get("recent", []))
+        engine.settled = None if state.get("settled") is None else cls.from_state(state["settled"])
+        return engine
+
+    def save(self, path):
+        """Guarda el checkpoint de forma atómica (archivo temporal + `os.replace`)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, mean_window=30, std_window=30, revision_window=7):
+        """Carga el checkpoint de `path`; si no existe o sus ventanas son distintas, empieza de cero."""
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                engine = cls.from_state(json.load(f))
+            if (engine.mean_window.size, engine.std_window.size, engine.revision_window) == (
+                    mean_window, std_window, revision_window):
+                return engine
+        return cls(mean_window, std_window, revision_window)
+
+
+def advance_checkpoint(db_path, checkpoint_path, mean_window=30, std_window=30, revision_window=7):
+    """Procesa las filas de la BD enriquecida posteriores al checkpoint, lo guarda y devuelve sus KPIs.
+
+    Se vuelven a leer las barras de la ventana de revisión (por defecto los 7 días que reprocesa
+    el enriquecedor) para detectar las que cambiaron. Si cambió el número de filas anteriores a esa
+    ventana, el checkpoint ya no corresponde a la BD y se recalcula desde cero.
+    """
+    engine = StreamingKPIs.load(checkpoint_path, mean_window, std_window, revision_window)
+    conn = sqlite3.connect(db_path)
+    try:
+        settled = engine.settled
+        if settled is not None and settled.last_date is not None:
+            older = conn.execute("SELECT COUNT(*) FROM enriched_historical WHERE date <= ?",
+                                 (settled.last_date.strftime("%Y-%m-%d %H:%M:%S"),)).fetchone()[0]
+            if older != settled.count:
+                print("⚠ Cambiaron filas anteriores a la ventana de revisión: se recalculan los KPIs desde cero.")
+                engine = StreamingKPIs(mean_window, std_window, revision_window)
+
+        query = "SELECT date, high, low, close FROM enriched_historical"
+        params = []
+        if engine.recent:
+            query += " WHERE date >= ?"
+            params.append(engine.recent[0][0].strftime("%Y-%m-%d %H:%M:%S"))
+        elif engine.last_date is not None:
+            query += " WHERE date > ?"
+            params.append(engine.last_date.strftime("%Y-%m-%d %H:%M:%S"))
+        rows = pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+    rows["date"] = pd.to_datetime(rows["date"])
+
+    kpis = engine.advance(rows)
+    engine.save(checkpoint_path)
+    return kpis
+
+
+def _count(db_path, table):
+    """Filas de `table`, o None si la BD o la tabla no existen."""
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+
+def kpi_table_ready(db_path):
+    """True si la tabla de KPIs existe y tiene una fila por cada fila de `enriched_historical`."""
+    count = _count(db_path, KPI_TABLE)
+    return count is not None and count == _count(db_path, "enriched_historical")
+
+
+def write_kpi_table(db_path, kpis):
+    """Reemplaza en la tabla de KPIs las barras desde la primera de `kpis` (nuevas o revisadas)."""
+    if kpis.empty:
+        return
+    rows = kpis.copy()
+    rows["date"] = rows["date"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if KPI_TABLE in tables:
+                # También se quitan las fechas que ya no están en la tabla enriquecida
+                conn.execute(f"DELETE FROM {KPI_TABLE} WHERE date >= ? OR date NOT IN (SELECT date FROM enriched_historical)",
+                             (rows["date"].iloc[0],))
+            rows.to_sql(KPI_TABLE, conn, if_exists="append", index=False)
+    finally:
+        conn.close()
+
+
+def load_kpi_table(db_path):
+    """KPIs por día guardados por el pipeline en orden cronológico, o None si la tabla no existe."""
+    conn = sqlite3.connect(db_path)
+    try:
+        kpis = pd.read_sql_query(f"SELECT * FROM {KPI_TABLE} ORDER BY date", conn)
+    except (sqlite3.OperationalError, pd.errors.DatabaseError):
+        return None
+    finally:
+        conn.close()
+    kpis["date"] = pd.to_datetime(kpis["date"])
+    return kpis
+
+
+def sync_kpi_table(db_path, checkpoint_path, mean_window=30, std_window=30, revision_window=7):
+    """Avanza el checkpoint y guarda en la tabla de KPIs las barras nuevas o revisadas; devuelve esas barras.
+
+    Si la tabla falta o no tiene una fila por cada barra del checkpoint (por ejemplo, una BD
+    descargada sin ella), se descarta el checkpoint y se recalculan todos los KPIs.
+    """
+    engine = StreamingKPIs.load(checkpoint_path, mean_window, std_window, revision_window)
+    if engine.count and _count(db_path, KPI_TABLE) != engine.count:
+        print(f"ℹ La tabla {KPI_TABLE} no corresponde al checkpoint: se recalculan los KPIs desde cero.")
+        os.remove(checkpoint_path)
+    kpis = advance_checkpoint(db_path, checkpoint_path, mean_window, std_window, revision_window)
+    write_kpi_table(db_path, kpis)
+    return kpis
+
+
+if __name__ == "__main__":
+    data_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data"))
+
+    parser = argparse.ArgumentParser(description="Avanza el checkpoint de KPIs con las filas nuevas de la BD enriquecida "
+                                                 f"y las guarda en la tabla {KPI_TABLE}")
+    parser.add_argument("--db", default=os.path.join(data_dir, "enriched_historical.db"))
+    parser.add_argument("--checkpoint", default=os.path.join(data_dir, "kpi_state.json"))
+    parser.add_argument("--mean-window", type=int, default=30)
+    parser.add_argument("--std-window", type=int, default=30)
+    parser.add_argument("--revision-window", type=int, default=7,
+                        help="Últimas barras que se vuelven a comparar por si el enriquecedor las revisó")
+    args = parser.parse_args()
+
+    kpis = sync_kpi_table(args.db, args.checkpoint, args.mean_window, args.std_window, args.revision_window)
+    print(f"✅ {len(kpis)} barras nuevas o revisadas procesadas, checkpoint en {args.checkpoint}")
+    if not kpis.empty:
+        print(kpis.tail(1).to_string(index=False))
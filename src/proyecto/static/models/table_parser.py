@@ -0,0 +1,97 @@
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+except ImportError:  # lxml es opcional, se usa BeautifulSoup como respaldo
+    lxml = None
+
+COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+
+
+def _to_float(values):
+    """Convierte una columna de textos con separador de miles a floats."""
+    return [float(value.replace(',', '').strip()) for value in values]
+
+
+def _to_volume(values):
+    """Convierte una columna de textos a enteros; los valores no numéricos quedan en 0."""
+    volumes = []
+    for value in values:
+        value = value.replace(',', '').strip()
+        volumes.append(int(value) if value.isdigit() else 0)
+    return volumes
+
+
+def build_columns(cells):
+    """Construye las columnas a partir de las celdas de texto agrupadas por columna.
+
+    `cells` es una lista de 6 listas (fecha, apertura, máximo, mínimo, cierre, volumen).
+    """
+    dates, opens, highs, lows, closes, volumes = cells
+    return {
+        'date': [value.strip() for value in dates],
+        'open': _to_float(opens),
+        'high': _to_float(highs),
+        'low': _to_float(lows),
+        'close': _to_float(closes),
+        'volume': _to_volume(volumes),
+    }
+
+
+class BeautifulSoupTableParser:
+    """Extrae la tabla histórica con BeautifulSoup y el parser `html.parser` (Python puro)."""
+    name = 'bs4'
+
+    def parse(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        table = soup.find('table')
+        if not table:
+            return None
+
+        cells = [[] for _ in COLUMNS]
+        for row in table.find_all('tr')[1:]:
+            cols = row.find_all('td')
+            if len(cols) >= 6:
+                for i in range(len(COLUMNS)):
+                    cells[i].append(cols[i].text)
+        return build_columns(cells)
+
+
+class LxmlTableParser:
+    """Extrae la tabla histórica con lxml (libxml2, en C) llenando las columnas directamente."""
+    name = 'lxml'
+
+    def parse(self, html):
+        try:
+            root = lxml.html.fromstring(html)
+        except lxml.etree.ParserError:
+            # Cuerpo vacío o sin elementos: igual que una página sin tabla (BeautifulSoup tampoco falla)
+            return None
+        tables = root.xpath('//table')
+        if not tables:
+            return None
+
+        cells = [[] for _ in COLUMNS]
+        for row in tables[0].iter('tr'):
+            cols = row.findall('td')
+            if len(cols) >= 6:
+                for i in range(len(COLUMNS)):
+                    cells[i].append(cols[i].text_content())
+        return build_columns(cells)
+
+
+PARSERS = {
+    BeautifulSoupTableParser.name: BeautifulSoupTableParser,
+    LxmlTableParser.name: LxmlTableParser,
+}
+
+
+def get_parser(name='auto'):
+    """Devuelve el backend de extracción solicitado; 'auto' usa lxml si está instalado."""
+    if name == 'auto':
+        name = 'lxml' if lxml is not None else 'bs4'
+    if name == 'lxml' and lxml is None:
+        raise ImportError("El backend 'lxml' requiere instalar el paquete lxml.")
+    if name not in PARSERS:
+        raise ValueError(f"Backend de extracción desconocido: {name}")
+    return PARSERS[name]()
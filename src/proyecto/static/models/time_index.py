@@ -0,0 +1,37 @@
+import pandas as pd
+
+
+class TimeIndexedFrame:
+    """DataFrame ordenado de forma ascendente por fecha con un `DatetimeIndex`.
+
+    Las consultas por rango de fechas se resuelven con búsqueda binaria (`searchsorted`) y
+    devuelven cortes posicionales (`iloc`), que no copian los datos.
+    """
+
+    def __init__(self, df, date_column="date"):
+        dates = pd.DatetimeIndex(df[date_column])
+        if not dates.is_monotonic_increasing:
+            order = dates.argsort(kind="stable")
+            df = df.iloc[order]
+            dates = dates[order]
+        # Copia superficial: solo cambia el índice, las columnas se comparten con `df`
+        self.frame = df.copy(deep=False)
+        self.frame.index = dates.rename(None)
+
+    @property
+    def start(self):
+        return self.frame.index[0]
+
+    @property
+    def end(self):
+        return self.frame.index[-1]
+
+    def __len__(self):
+        return len(self.frame)
+
+    def slice(self, start=None, end=None):
+        """Filas con fecha entre `start` y `end` (ambos días incluidos) sin copiar los datos."""
+        index = self.frame.index
+        i = 0 if start is None else index.searchsorted(pd.Timestamp(start), side="left")
+        j = len(index) if end is None else index.searchsorted(pd.Timestamp(end) + pd.Timedelta(days=1), side="left")
+        return self.frame.iloc[i:j]